@@ -0,0 +1,52 @@
+from collections import namedtuple
+
+import numpy as np
+
+BacktestResult = namedtuple("BacktestResult", ["pnl", "gross", "returns"])
+
+
+def next_returns(prices):
+    """Return From Each Bar To The Next (pct_change().shift(-1)), Time On Axis -2"""
+    prices = np.asarray(prices, dtype=float)
+    ret = np.full(prices.shape, np.nan)
+    ret[..., :-1, :] = prices[..., 1:, :] / prices[..., :-1, :] - 1
+    return ret
+
+
+def lookback_returns(prices, lookback):
+    """Return Over The Last lookback Bars (pct_change(lookback)), Time On Axis -2"""
+    prices = np.asarray(prices, dtype=float)
+    ret = np.full(prices.shape, np.nan)
+    ret[..., lookback:, :] = prices[..., lookback:, :] / prices[..., :-lookback, :] - 1
+    return ret
+
+
+def backtest(positions, prices, costs=0.0, capital=None):
+    """
+    Shared Backtest Core.
+
+    positions is the capital held in each instrument at the close of each bar, shape
+    (T, N) or (P, T, N) for P parameter sets; prices is (T, N) (or broadcastable). PnL of
+    bar t is earned over the next bar. costs charges that fraction of every unit of
+    capital traded, i.e. of |pos_t - pos_t-1 * (1 + r_t-1)| so price drift of a held
+    position is not a trade; the first bar counts as a trade from flat. Returns are PnL over
+    capital, which defaults to the gross exposure sum(|positions|). NaNs propagate, so
+    callers drop the incomplete rows as before.
+    """
+    positions = np.asarray(positions, dtype=float)
+    ret = next_returns(prices)
+    pnl = np.sum(positions * ret, axis=-1)
+    gross = np.sum(np.abs(positions), axis=-1)
+
+    if costs:
+        """Trades are the change from the previous bar's position after it drifted with the price"""
+        drifted = np.zeros(np.broadcast_shapes(positions.shape, ret.shape))
+        drifted[..., 1:, :] = positions[..., :-1, :] * (1 + ret[..., :-1, :])
+        traded = np.abs(positions - drifted)
+        pnl = pnl - costs * np.sum(traded, axis=-1)
+
+    if capital is None:
+        capital = gross
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = pnl / capital
+    return BacktestResult(pnl, gross, returns)
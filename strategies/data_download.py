@@ -2,34 +2,18 @@
 import os
 from datetime import date
 
-import requests
 from nsepy import get_history
 
+from strategies.downloader import fetch_yearly, update_tickers
+from strategies.panel_store import update_panel
 from strategies.utils import *
 
 
 # In[ ]
-def fetch_nse_url(url, start_year, end_year):
-    """Fetch Data From NSE Website"""
-    data = []
-    headers = {
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:100.0) Gecko/20100101 Firefox/100.0",
-        "Host": "www.nseindia.com",
-    }
-    home = "https://www.nseindia.com"
-    params = {"index": "equities",
-              "from_date": "07-05-2021",
-              "to_date": "07-05-2022"
-              }
-    sess = requests.session()
-    sess.get(home, headers=headers)
+def fetch_nse_url(url, start_year, end_year, client=None, max_workers=8):
+    """Fetch Data From NSE Website, One Request Per Year On A Thread Pool"""
     print(f"fetching {url}")
-    for i in range(start_year, end_year):
-        params["from_date"] = date(year=i, month=1, day=1).strftime("%d-%m-%Y")
-        params["to_date"] = date(year=i + 1, month=1, day=1).strftime("%d-%m-%Y")
-        resp = sess.get(url=url, params=params, headers=headers).json()
-        print(f"year: {i}, resp len:{len(resp)}")
-        data.extend(resp)
+    data = fetch_yearly(url, start_year, end_year, client=client, max_workers=max_workers)
     df = pd.DataFrame.from_records(data)
     return df
 
@@ -52,35 +36,24 @@ def fetch_nse_event_calender(start_year=2015, end_year=2020):
     return df
 
 
-def fetch_nifty_constituents_data(index="NIFTY 100", start_date=date(2015, 1, 1), end_date=date(2020, 1, 1)):
-    """Fetch Daily Data For Index Components"""
-    idx_comp = list(pd.read_csv(f"./data/equity/{index.replace(' ', '_')}_STOCKS_LIST.csv")["Symbol"])
-
-    for ticker in idx_comp:
-        data = get_history(ticker, start=start_date, end=end_date)
-        data.to_csv(f"./data/equity/{index.replace(' ', '_')}/{ticker}.csv")
-        print(f"fetched {ticker}....")
+def fetch_history(ticker, start, end):
+    return get_history(ticker, start=start, end=end)
 
 
-def merge_multiple_tickers():
-    """Merge Individual Files Into Two (Open & Close) Price Files"""
-    idx_comp = list(pd.read_csv(f"./data/equity/NIFTY_100_STOCKS_LIST.csv")["Symbol"])
-    for tp in ["Open", "Close"]:
-        df = None
-        for ticker in idx_comp:
-            data = pd.read_csv(f"./data/equity/NIFTY_100/{ticker}.csv", parse_dates=["Date"],
-                               index_col="Date")[[tp]]
+def fetch_nifty_constituents_data(index="NIFTY 100", start_date=date(2015, 1, 1), end_date=date(2020, 1, 1),
+                                  max_workers=8, rate=None):
+    """Fetch Daily Data For Index Components, Only The Dates Not Already On Disk"""
+    idx_comp = list(pd.read_csv(f"./data/equity/{index.replace(' ', '_')}_STOCKS_LIST.csv")["Symbol"])
+    return update_tickers(idx_comp, fetch_history, f"./data/equity/{index.replace(' ', '_')}", start_date, end_date,
+                          max_workers=max_workers, rate=rate)
 
-            data.columns = [ticker]
-            data = data.fillna(-1)
-            if df is None:
-                df = data
-            else:
-                df = df.join(data)
 
-            print(f"fetched {ticker}....")
-        df.to_csv(f"./data/equity/NIFTY_100_CONSTITUENTS_DATA_{tp}.csv")
-        print("done")
+def merge_multiple_tickers(root="./data/equity/NIFTY_100_CONSTITUENTS_DATA"):
+    """Append New Rows Of The Individual Files To The Open & Close Panels (read_panel(root, "Close"))"""
+    idx_comp = list(pd.read_csv(f"./data/equity/NIFTY_100_STOCKS_LIST.csv")["Symbol"])
+    files = {ticker: f"./data/equity/NIFTY_100/{ticker}.csv" for ticker in idx_comp}
+    added = update_panel(files, root, fields=("Open", "Close"))
+    print(f"done, {added} new sessions")
 
 
 def merge_csvs():
@@ -94,9 +67,7 @@ def merge_csvs():
         df.columns = [file[:-4]]
         dfs.append(df)
 
-    df = reduce(
-        lambda left, right: pd.merge(left, right, how="outer", left_index=True, right_index=True), dfs
-    )
+    df = merge_df(dfs, how="outer")
     df.to_csv("./data/forex/MERGED.csv")
     print(tabulate(df.tail(5), headers=df.columns))
 
@@ -0,0 +1,232 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .utils import *
+
+NSE_HOME = "https://www.nseindia.com"
+COVERAGE = "coverage.json"
+NSE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:100.0) Gecko/20100101 Firefox/100.0",
+    "Host": "www.nseindia.com",
+}
+
+
+def pooled_session(pool_size=16, headers=None):
+    """requests Session Whose Connection Pool Is Shared By pool_size Threads"""
+    sess = requests.session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    sess.mount("http://", adapter)
+    sess.mount("https://", adapter)
+    if headers:
+        sess.headers.update(headers)
+    return sess
+
+
+class RateLimiter:
+    """Spaces Calls From All Threads At Least 1 / rate Seconds Apart (rate=None: No Limit)"""
+
+    def __init__(self, rate=None):
+        self.interval = 1 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        time.sleep(max(start - now, 0))
+
+
+def with_retries(fn, *args, retries=3, backoff=0.5, **kwargs):
+    """Call fn, Retrying Up To retries Times With Jittered Exponential Backoff"""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt * (1 + random.random()))
+
+
+def fetch_json(client, url, params=None, headers=None, limiter=None, timeout=30, retries=3, backoff=0.5):
+    """
+    GET url And Decode JSON, Rate Limited And Retried.
+
+    client is anything with requests' get(url, params=, headers=, timeout=) interface,
+    e.g. pooled_session() or a stand-in for tests.
+    """
+
+    def get():
+        if limiter is not None:
+            limiter.wait()
+        resp = client.get(url, params=params, headers=headers, timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    return with_retries(get, retries=retries, backoff=backoff)
+
+
+def fetch_yearly(url, start_year, end_year, client=None, home=NSE_HOME, headers=None, max_workers=8, rate=None,
+                 retries=3):
+    """
+    Fetch One Request Per Year Of [start_year, end_year) Concurrently Over A Shared Session.
+
+    Visits home first (NSE hands out the cookies there). Returns the records of all years
+    in year order.
+    """
+    headers = NSE_HEADERS if headers is None else headers
+    client = pooled_session(max_workers) if client is None else client
+    limiter = RateLimiter(rate)
+    client.get(home, headers=headers)
+
+    def fetch_year(year):
+        params = {"index": "equities",
+                  "from_date": date(year=year, month=1, day=1).strftime("%d-%m-%Y"),
+                  "to_date": date(year=year + 1, month=1, day=1).strftime("%d-%m-%Y")}
+        resp = fetch_json(client, url, params, headers, limiter, retries=retries)
+        print(f"year: {year}, resp len:{len(resp)}")
+        return resp
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        years = list(executor.map(fetch_year, range(start_year, end_year)))
+    return [record for records in years for record in records]
+
+
+def stored_range(path):
+    """First And Last Date Of A Per Ticker CSV (Date Index First), Reading Only Its Head & Tail"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as f:
+        f.readline()
+        first = f.readline()
+        f.seek(max(os.path.getsize(path) - 4096, 0))
+        last = [line for line in f.read().splitlines() if line.strip()][-1]
+    if not first.strip():
+        return None
+    return pd.Timestamp(first.split(b",")[0].decode()).date(), pd.Timestamp(last.split(b",")[0].decode()).date()
+
+
+def read_coverage(directory):
+    """{ticker: [(start, end), ...]} Date Ranges Already Requested, From directory's Coverage Manifest"""
+    path = os.path.join(directory, COVERAGE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {ticker: [(date.fromisoformat(a), date.fromisoformat(b)) for a, b in ranges]
+                for ticker, ranges in json.load(f).items()}
+
+
+def write_coverage(directory, coverage):
+    """Atomic Replace, So An Interrupted Run Keeps The Previous Manifest"""
+    with atomic_write(os.path.join(directory, COVERAGE)) as f:
+        json.dump({ticker: [(a.isoformat(), b.isoformat()) for a, b in ranges]
+                   for ticker, ranges in sorted(coverage.items())}, f)
+
+
+def add_range(ranges, start, end):
+    """Sorted, Merged Ranges After Adding [start, end] (Adjacent Ranges Are Joined)"""
+    merged = []
+    for a, b in sorted(list(ranges) + [(start, end)]):
+        if merged and a <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+        else:
+            merged.append((a, b))
+    return merged
+
+
+def missing_ranges(covered, start, end):
+    """Sub Ranges Of [start, end] Outside The covered Ranges"""
+    gaps = []
+    cursor = start
+    for a, b in sorted(covered):
+        if b < cursor:
+            continue
+        if a > end:
+            break
+        if a > cursor:
+            gaps.append((cursor, a - timedelta(days=1)))
+        cursor = b + timedelta(days=1)
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def update_ticker(ticker, fetch, path, start, end, covered=None, limiter=None, retries=3):
+    """
+    Bring One Ticker File Up To [start, end], Downloading Only The Missing Ranges.
+
+    covered lists the date ranges already requested for the ticker, so holidays, weekends
+    and the time before a listing are not asked for again; without it the file's first to
+    last date is assumed covered. A range is recorded once fetched (empty or not), except
+    today, whose data may not be final yet. fetch(ticker, start, end) returns a DataFrame
+    indexed by Date. Rows after the stored history are appended, earlier ones (rare) are
+    merged in by rewriting the file. Returns (rows added, covered ranges).
+    """
+    if covered is None:
+        stored = stored_range(path)
+        covered = [] if stored is None else [stored]
+
+    added = 0
+    for range_start, range_end in missing_ranges(covered, start, end):
+        if limiter is not None:
+            limiter.wait()
+        data = with_retries(fetch, ticker, range_start, range_end, retries=retries)
+        if data is not None and len(data):
+            data.index = pd.to_datetime(data.index)
+            data = data[(data.index.date >= range_start) & (data.index.date <= range_end)]
+            stored = stored_range(path)
+            if stored is None or stored[1] < range_start:
+                data.to_csv(path, mode="w" if stored is None else "a", header=stored is None, index_label="Date")
+            else:
+                df = pd.read_csv(path, index_col="Date", parse_dates=["Date"])
+                df = pd.concat([df, data])
+                with atomic_write(path) as f:
+                    df[~df.index.duplicated(keep="last")].sort_index().to_csv(f, index_label="Date")
+            added += len(data)
+
+        settled = min(range_end, date.today() - timedelta(days=1))
+        if settled >= range_start:
+            covered = add_range(covered, range_start, settled)
+    return added, covered
+
+
+def update_tickers(tickers, fetch, directory, start, end, max_workers=8, rate=None, retries=3):
+    """
+    update_ticker For Every Ticker On A Thread Pool Sharing One Rate Limiter.
+
+    Requested ranges are kept per ticker in directory's coverage.json (seeded from the
+    CSVs on first use), so a rerun over an up to date universe makes no requests. Failures
+    of single tickers are reported, not raised. Returns {ticker: rows added or the
+    exception}.
+    """
+    os.makedirs(directory, exist_ok=True)
+    limiter = RateLimiter(rate)
+    coverage = read_coverage(directory)
+    lock = threading.Lock()
+
+    def update(ticker):
+        try:
+            added, covered = update_ticker(ticker, fetch, os.path.join(directory, f"{ticker}.csv"), start, end,
+                                           coverage.get(ticker), limiter, retries)
+            with lock:
+                coverage[ticker] = covered
+                write_coverage(directory, coverage)
+            print(f"fetched {ticker}: {added} rows")
+            return added
+        except Exception as e:
+            print(f"failed {ticker}: {e}")
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(tickers, executor.map(update, tickers)))
@@ -0,0 +1,171 @@
+from .utils import *
+
+
+class TradingCalendar:
+    """Sorted Trading Sessions With Vectorized Date -> Session Lookups"""
+
+    def __init__(self, dates):
+        self.dates = pd.DatetimeIndex(dates).unique().sort_values().rename("Date")
+
+    def __len__(self):
+        return len(self.dates)
+
+    def next_session(self, dates, inclusive=False):
+        """Index Of The First Session After (Or On, If inclusive) Each Date In One searchsorted, -1 If None"""
+        idx = self.dates.searchsorted(pd.DatetimeIndex(dates), side="left" if inclusive else "right")
+        return np.where(idx < len(self), idx, -1)
+
+    def session_index(self, dates):
+        """Index Of Each Date's Session, -1 For Dates That Are Not Sessions"""
+        return self.dates.get_indexer(pd.DatetimeIndex(dates))
+
+
+class EventIndex:
+    """
+    Sparse (Session, Ticker) Coordinates Of Events On A TradingCalendar.
+
+    Coordinates are kept sorted and unique as two int arrays; the dense (sessions,
+    tickers) panel is only built on demand, in one scatter.
+    """
+
+    def __init__(self, calendar, tickers, date_idx, ticker_idx):
+        self.calendar = calendar
+        self.tickers = pd.Index(tickers)
+        keys = np.unique(np.asarray(date_idx, dtype=np.int64) * len(self.tickers) + np.asarray(ticker_idx))
+        self.date_idx, self.ticker_idx = np.divmod(keys, len(self.tickers))
+
+    @classmethod
+    def from_events(cls, calendar, tickers, dates, symbols, inclusive=False):
+        """
+        Index Of A Long Table Of (date, symbol) Events.
+
+        Each event is mapped to the next session after its date (on or after if
+        inclusive); symbols outside tickers and dates past the calendar are dropped.
+        """
+        tickers = pd.Index(tickers)
+        ticker_idx = tickers.get_indexer(pd.Index(symbols))
+        date_idx = calendar.next_session(dates, inclusive)
+        keep = (ticker_idx >= 0) & (date_idx >= 0)
+        return cls(calendar, tickers, date_idx[keep], ticker_idx[keep])
+
+    def __len__(self):
+        return len(self.date_idx)
+
+    @property
+    def keys(self):
+        return self.date_idx * len(self.tickers) + self.ticker_idx
+
+    def difference(self, other):
+        """Events Not In other (Same Calendar & Tickers)"""
+        keep = ~np.isin(self.keys, other.keys, assume_unique=True)
+        return EventIndex(self.calendar, self.tickers, self.date_idx[keep], self.ticker_idx[keep])
+
+    def to_panel(self, dtype=bool):
+        """Dense (Sessions, Tickers) Event Panel"""
+        panel = np.zeros((len(self.calendar), len(self.tickers)), dtype=dtype)
+        panel[self.date_idx, self.ticker_idx] = 1
+        return panel
+
+    def to_frame(self, dtype=int):
+        return pd.DataFrame(self.to_panel(dtype), index=self.calendar.dates, columns=self.tickers)
+
+    def save(self, path):
+        """Compact .npz: Calendar, Tickers And The Coordinates"""
+        np.savez_compressed(path, dates=self.calendar.dates.values, tickers=np.array(self.tickers, dtype=str),
+                            date_idx=self.date_idx.astype(np.int32), ticker_idx=self.ticker_idx.astype(np.int32))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(TradingCalendar(data["dates"]), data["tickers"], data["date_idx"], data["ticker_idx"])
+
+
+class StepPanel:
+    """
+    Per Ticker Piecewise Constant (Sessions, Tickers) Panel, e.g. A Stock Split Mask.
+
+    Stored as change points: (session, ticker, value) wherever a ticker's value differs
+    from the previous session (NaN runs included), always including the first session.
+    The dense panel is expanded lazily, or the panel is multiplied into a price array
+    segment by segment without being expanded.
+    """
+
+    def __init__(self, calendar, tickers, date_idx, ticker_idx, values):
+        self.calendar = calendar
+        self.tickers = pd.Index(tickers)
+        order = np.lexsort((date_idx, ticker_idx))
+        self.date_idx = np.asarray(date_idx)[order]
+        self.ticker_idx = np.asarray(ticker_idx)[order]
+        self.values = np.asarray(values, dtype=float)[order]
+
+    @classmethod
+    def from_frame(cls, df):
+        """Change Points Of A Dense (Dates, Tickers) DataFrame"""
+        v = df.values.astype(float)
+        same = (v[1:] == v[:-1]) | (np.isnan(v[1:]) & np.isnan(v[:-1]))
+        change = np.vstack([np.ones((1, v.shape[1]), dtype=bool), ~same])
+        date_idx, ticker_idx = np.nonzero(change)
+        return cls(TradingCalendar(df.index), df.columns, date_idx, ticker_idx, v[date_idx, ticker_idx])
+
+    def __len__(self):
+        return len(self.values)
+
+    def _segment_ends(self):
+        """Exclusive End Session Of Every Change Point's Segment"""
+        ends = np.append(self.date_idx[1:], len(self.calendar))
+        last = np.append(self.ticker_idx[1:] != self.ticker_idx[:-1], True)
+        return np.where(last, len(self.calendar), ends)
+
+    def to_panel(self):
+        """Dense (Sessions, Tickers) Panel: Scatter Change Point Ids, Carry Them Forward, Gather"""
+        ids = np.full((len(self.calendar), len(self.tickers)), -1)
+        ids[self.date_idx, self.ticker_idx] = np.arange(len(self))
+        ids = np.maximum.accumulate(ids, axis=0)
+        return np.where(ids >= 0, self.values[ids], np.nan)
+
+    def to_frame(self):
+        return pd.DataFrame(self.to_panel(), index=self.calendar.dates, columns=self.tickers)
+
+    def apply(self, prices):
+        """
+        Multiply prices By The Panel.
+
+        A (sessions, tickers) float ndarray in the panel's order is updated in place, one
+        slice per segment. A DataFrame is aligned on the panel's dates and tickers (labels
+        the panel does not cover become NaN, as with df * mask) and a new one is returned.
+        """
+        if isinstance(prices, pd.DataFrame):
+            values = prices.reindex(index=self.calendar.dates, columns=self.tickers).to_numpy(dtype=float, copy=True)
+            values = pd.DataFrame(self.apply(values), index=self.calendar.dates, columns=self.tickers)
+            return values.reindex(index=prices.index, columns=prices.columns)
+
+        for start, end, ticker, value in zip(self.date_idx, self._segment_ends(), self.ticker_idx, self.values):
+            if value != 1:
+                prices[start:end, ticker] *= value
+        return prices
+
+    def save(self, path):
+        """Compact .npz: Calendar, Tickers And The Change Points"""
+        np.savez_compressed(path, dates=self.calendar.dates.values, tickers=np.array(self.tickers, dtype=str),
+                            date_idx=self.date_idx.astype(np.int32), ticker_idx=self.ticker_idx.astype(np.int32),
+                            values=self.values)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(TradingCalendar(data["dates"]), data["tickers"], data["date_idx"], data["ticker_idx"],
+                   data["values"])
+
+
+def main():
+    """Convert The Dense Event & Split Mask CSVs To Their Compact .npz Form"""
+    events = read_df("./data/equity/NIFTY_100_POST_EARN_ANN.csv")
+    date_idx, ticker_idx = np.nonzero(events.values)
+    EventIndex(TradingCalendar(events.index), events.columns, date_idx, ticker_idx).save(
+        "./data/equity/NIFTY_100_POST_EARN_ANN.npz")
+    StepPanel.from_frame(read_df("./data/equity/NIFTY_100_STOCKS_SPLIT_MASK.csv")).save(
+        "./data/equity/NIFTY_100_STOCKS_SPLIT_MASK.npz")
+
+
+if __name__ == "__main__":
+    main()
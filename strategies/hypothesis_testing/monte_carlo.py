@@ -1,43 +1,83 @@
 # In[ ]:
 import os
+import pickle
 from pathlib import Path
 
 from scipy.stats import pearson3
 
-from ..mean_reversion.bollinger_bands import bollinger_bands
+from ..mean_reversion.bollinger_bands import bollinger_bands_returns
+from ..memo import cached_pearson3_fit
 from ..utils import *
 
 
 # In[ ]:
-def monte_carlo(df, strategy, num_simulations=100):
-    obs_returns = strategy(df)
-    obs_mean = obs_returns.mean()
-    print(f"Actual return: {obs_mean}")
+def _simulate_chunk(seed_seq, param, length, num_paths, strategy, vectorized):
+    """Strategy Mean Return On num_paths Simulated Price Paths Drawn From One RNG Stream"""
+    rng = np.random.default_rng(seed_seq)
+    sim_returns = pearson3.rvs(*param[:-2], loc=param[-2], scale=param[-1], size=(num_paths, length),
+                               random_state=rng)
+    prices = np.cumprod(1 + sim_returns, axis=1)
+
+    if vectorized:
+        """(T, num_paths) price matrix in, (T', num_paths) strategy returns out"""
+        return np.nanmean(strategy(prices.T), axis=0)
+
+    return np.array([np.mean(strategy(pd.DataFrame(path, columns=["Close"]))) for path in prices])
+
+
+def _picklable(obj):
+    try:
+        pickle.dumps(obj)
+        return True
+    except (pickle.PicklingError, AttributeError, TypeError):
+        return False
 
-    returns = df["Close"].pct_change().dropna()
-    param = pearson3.fit(returns)  # Scipy only has pearson3
 
-    nums_better = 0
-    for i in range(num_simulations):
-        sim_returns = pearson3.rvs(*param[:-2], loc=param[-2], scale=param[-1], size=len(returns))
-        sim_mean = np.mean(sim_returns)
+def simulate_strategy_means(param, length, strategy, num_simulations, vectorized=False, seed=0, chunk_size=1000,
+                            max_workers=None):
+    """
+    Mean Strategy Return On Each Of num_simulations Pearson III Price Paths.
 
-        df = pd.DataFrame(np.cumprod(1 + sim_returns), columns=["Close"])
-        strat_returns = strategy(df)
-        strat_mean = strat_returns.mean()
+    Paths are drawn in fixed chunks of chunk_size, each from its own stream spawned off
+    `seed`, so for a given chunk_size results do not depend on the number of workers.
+    Vectorized strategies take a (T, paths) price matrix and are run chunk by chunk in
+    process; other strategies take a DataFrame with a "Close" column and are spread over a
+    process pool when strategy is picklable (a module level function or functools.partial),
+    in process otherwise (e.g. a lambda).
+    """
+    sizes = [min(chunk_size, num_simulations - i) for i in range(0, num_simulations, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(seed_seq, param, length, size, strategy, vectorized) for seed_seq, size in zip(seeds, sizes)]
+
+    if vectorized or not _picklable(strategy):
+        max_workers = 1
+    return np.concatenate(pool_map(_simulate_chunk, *zip(*args), max_workers=max_workers))
+
+
+def monte_carlo(df, strategy, num_simulations=100, vectorized=False, seed=0, chunk_size=1000, max_workers=None):
+    if vectorized:
+        obs_mean = np.nanmean(strategy(df["Close"].values[:, np.newaxis]))
+    else:
+        obs_mean = strategy(df.copy()).mean()
+    print(f"Actual return: {obs_mean}")
+
+    returns = df["Close"].pct_change().dropna()
+    param = cached_pearson3_fit(returns)  # Scipy only has pearson3
 
-        if strat_mean > obs_mean:
-            nums_better += 1
-        print(f"sim: {i}, mkt mean return : {sim_mean}, strat mean return: {strat_mean}")
+    sim_means = simulate_strategy_means(param, len(returns), strategy, num_simulations, vectorized=vectorized,
+                                        seed=seed, chunk_size=chunk_size, max_workers=max_workers)
+    p_value = np.mean(sim_means > obs_mean)
 
-    print(f"Monte Carlo p-value: {nums_better / num_simulations:0.3f}")
+    print(f"Simulated strategy mean return: {np.mean(sim_means)}, std: {np.std(sim_means)}")
+    print(f"Monte Carlo p-value: {p_value:0.3f}")
+    return p_value, sim_means
 
 
 # In[ ]:
 def main():
     data_dir = os.path.join(Path(os.getcwd()), "data/equity")
     df = read_df(data_dir + "/IND_IDX_NIFTY_50.csv")
-    monte_carlo(df, lambda x: bollinger_bands(x, show_results=False))
+    monte_carlo(df, bollinger_bands_returns, num_simulations=10000, vectorized=True)
 
 
 if __name__ == "__main__":
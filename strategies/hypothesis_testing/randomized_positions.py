@@ -9,7 +9,40 @@ from ..utils import *
 
 
 # In[ ]:
-def randomize_positions(df, strategy, num_simulations=100):
+def _permutation_index(rng, length, num_permutations, block_size=None):
+    """(num_permutations, length) Indices Of Shuffled Positions, Optionally Moving Whole Blocks"""
+    if block_size is None or block_size <= 1:
+        return rng.permuted(np.tile(np.arange(length), (num_permutations, 1)), axis=1)
+
+    """Shuffle block order; the trailing partial block is dropped past `length`"""
+    num_blocks = -(-length // block_size)
+    order = rng.permuted(np.tile(np.arange(num_blocks), (num_permutations, 1)), axis=1)
+    idx = (order[:, :, np.newaxis] * block_size + np.arange(block_size)).reshape(num_permutations, -1)
+    return idx[idx < length].reshape(num_permutations, length)
+
+
+def permutation_means(mkt_returns, pos, num_simulations, block_size=None, chunk_size=2000, seed=None):
+    """
+    Mean Return Of num_simulations Randomly Permuted Position Series.
+
+    Each chunk of chunk_size permutations is one gather of the positions followed by one
+    matrix-vector product, so memory is bounded by chunk_size * len(pos). With block_size
+    the positions are shuffled in contiguous blocks, keeping holding periods intact.
+    """
+    mkt_returns = np.asarray(mkt_returns, dtype=float)
+    pos = np.asarray(pos, dtype=float)
+    rng = np.random.default_rng(seed)
+
+    sim_means = np.empty(num_simulations)
+    for start in range(0, num_simulations, chunk_size):
+        size = min(chunk_size, num_simulations - start)
+        idx = _permutation_index(rng, len(pos), size, block_size)
+        sim_means[start:start + size] = pos[idx] @ mkt_returns / len(pos)
+    return sim_means
+
+
+def randomize_positions(df, strategy, num_simulations=100, batched=True, block_size=None, chunk_size=2000,
+                        seed=None):
     mkt_returns = df["Close"].pct_change().dropna().to_numpy()
 
     obs_returns, pos = strategy(df, return_pos=True)
@@ -19,23 +52,27 @@ def randomize_positions(df, strategy, num_simulations=100):
     """Pad array since bollinger bands drops initial values (for moving avg calculations)"""
     pos = np.pad(pos.to_numpy(), (0, len(mkt_returns) - len(pos)), "constant")
 
-    nums_better = 0
-    for i in range(num_simulations):
-        np.random.shuffle(pos)  # Inplace
-        strat_mean = np.dot(mkt_returns, pos) / len(pos)
-
-        if strat_mean > obs_mean:
-            nums_better += 1
-        print(f"sim: {i}, strat mean return: {strat_mean}")
+    if batched:
+        sim_means = permutation_means(mkt_returns, pos, num_simulations, block_size=block_size,
+                                      chunk_size=chunk_size, seed=seed)
+    else:
+        rng = np.random.default_rng(seed)
+        sim_means = np.empty(num_simulations)
+        for i in range(num_simulations):
+            rng.shuffle(pos)  # Inplace
+            sim_means[i] = np.dot(mkt_returns, pos) / len(pos)
 
-    print(f"Randomized positions p-value: {nums_better / num_simulations:0.3f}")
+    p_value = np.mean(sim_means > obs_mean)
+    print(f"Randomized positions p-value: {p_value:0.3f}")
+    return p_value, sim_means
 
 
 # In[ ]:
 def main():
     data_dir = os.path.join(Path(os.getcwd()), "data/equity")
     df = read_df(data_dir + "/IND_IDX_NIFTY_50.csv")
-    randomize_positions(df, lambda x, return_pos: bollinger_bands(x, show_results=False, return_pos=return_pos))
+    randomize_positions(df, lambda x, return_pos: bollinger_bands(x, show_results=False, return_pos=return_pos),
+                        num_simulations=1000000, block_size=5)
 
 
 if __name__ == "__main__":
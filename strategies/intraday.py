@@ -0,0 +1,122 @@
+import os
+
+from .momentum.market_close_momentum import market_close_momentum_returns
+from .momentum.opening_gap import opening_gap_returns
+from .utils import *
+
+DEFAULT_SNAPSHOTS = {"Open": "open", "High": "high", "Low": "low", "930": "09:30", "315": "15:15", "Close": "close"}
+AGGREGATES = {"open": "first", "high": "max", "low": "min", "close": "last"}
+
+
+def iter_ticks(path, chunksize=1_000_000, columns=None):
+    """
+    Stream A Time Sorted Intraday File As DataFrame Chunks Of At Most chunksize Rows.
+
+    CSV files are read with pd.read_csv(chunksize=...); .npy files hold a structured array
+    (e.g. fields Datetime, Ticker, Price) and are memory-mapped and sliced, so only one
+    chunk is ever in memory.
+    """
+    if path.endswith(".npy"):
+        data = np.load(path, mmap_mode="r")
+        for start in range(0, len(data), chunksize):
+            chunk = pd.DataFrame(np.asarray(data[start:start + chunksize]))
+            yield chunk if columns is None else chunk[columns]
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+
+
+def _chunk_snapshots(chunk, snapshots, time_col, price_col, ticker_col):
+    """Partial Snapshots Of Every (Date, Ticker) In One Chunk"""
+    timestamp = pd.to_datetime(chunk[time_col])
+    day = timestamp.dt.normalize()
+    time_of_day = timestamp - day
+    keys = [day.rename("Date"), chunk[ticker_col].rename("Ticker") if ticker_col else pd.Series(
+        "", index=chunk.index, name="Ticker")]
+    price = chunk[price_col].astype(float)
+
+    parts = {}
+    for name, spec in snapshots.items():
+        if spec in AGGREGATES:
+            parts[name] = price.groupby(keys).agg(AGGREGATES[spec])
+        else:
+            """Last price at or before the snapshot time"""
+            at = time_of_day <= pd.Timedelta(spec + (":00" if spec.count(":") == 1 else ""))
+            parts[name] = price[at].groupby([key[at] for key in keys]).last()
+    return pd.DataFrame(parts)
+
+
+def _combine(partials, snapshots):
+    """Merge Partial Snapshots Of The Same (Date, Ticker) In Time Order"""
+    rules = {name: AGGREGATES.get(spec, "last") for name, spec in snapshots.items()}
+    return pd.concat(partials).groupby(level=["Date", "Ticker"], sort=True).agg(rules)
+
+
+def iter_daily_snapshots(chunks, snapshots=None, time_col="Datetime", price_col="Price", ticker_col=None):
+    """
+    Aggregate Streamed Ticks / Bars Into Per Day Snapshots, Yielding Each Completed Day.
+
+    snapshots maps output columns to "open", "high", "low", "close" or a time of day
+    ("09:30"), the latter taking the last price at or before that time. chunks must be in
+    time order (e.g. iter_ticks); only the partial snapshot of the last, possibly
+    unfinished day is carried between chunks, so memory stays bounded by the chunk size.
+    Yields DataFrames indexed by (Date, Ticker).
+    """
+    snapshots = DEFAULT_SNAPSHOTS if snapshots is None else snapshots
+    carry = None
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        partial = _chunk_snapshots(chunk, snapshots, time_col, price_col, ticker_col)
+        if carry is not None:
+            partial = _combine([carry, partial], snapshots)
+
+        last_day = partial.index.get_level_values("Date").max()
+        done = partial.index.get_level_values("Date") < last_day
+        carry = partial[~done]
+        if done.any():
+            yield partial[done]
+    if carry is not None and len(carry):
+        yield carry
+
+
+def daily_snapshots(path, snapshots=None, time_col="Datetime", price_col="Price", ticker_col=None,
+                    chunksize=1_000_000):
+    """
+    Per Day Snapshot Panels Of A Large Intraday File In One Pass.
+
+    Returns {snapshot name: (days, tickers) DataFrame}, e.g. "930", "315" and "Close" for
+    market_close_momentum_returns or Open / High / Low / Close for opening_gap_returns.
+    """
+    snapshots = DEFAULT_SNAPSHOTS if snapshots is None else snapshots
+    columns = [time_col, price_col] + ([ticker_col] if ticker_col else [])
+    days = pd.concat(iter_daily_snapshots(iter_ticks(path, chunksize, columns), snapshots, time_col, price_col,
+                                          ticker_col))
+    return {name: days[name].unstack("Ticker") for name in snapshots}
+
+
+def intraday_strategy_grid(panels, thresholds, z_entry_scores, snapshot="315", rolling_window=90):
+    """
+    market_close_momentum And opening_gap Returns For Every Ticker & Threshold In One Call.
+
+    panels is the output of daily_snapshots. Returns two (days, tickers, K) arrays.
+    """
+    close = panels["Close"].values
+    momentum = market_close_momentum_returns(close, panels[snapshot].values, thresholds)
+    gap = opening_gap_returns(panels["Open"].values, panels["High"].values, panels["Low"].values, close,
+                              z_entry_scores, rolling_window)
+    return momentum, gap
+
+
+def main(path="./data/intraday/NIFTY_50_STOCKS_MINUTE.csv"):
+    if not os.path.exists(path):
+        print(f"{path} not found: expected minute bars with Datetime, Ticker and Price columns")
+        return
+    panels = daily_snapshots(path, ticker_col="Ticker")
+    thresholds = np.linspace(0.001, 0.01, 10)
+    momentum, gap = intraday_strategy_grid(panels, thresholds, np.linspace(0.1, 1, 10))
+    sharpe = np.nanmean(momentum, axis=0) / np.nanstd(momentum, axis=0) * np.sqrt(252)
+    print_df(pd.DataFrame(sharpe, index=panels["Close"].columns, columns=thresholds), 20)
+
+
+if __name__ == "__main__":
+    main()
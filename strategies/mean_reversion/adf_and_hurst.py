@@ -6,6 +6,7 @@ import matplotlib.pyplot as plt
 import scipy
 import scipy.stats
 from arch.unitroot import VarianceRatio
+from statsmodels.tsa.adfvalues import mackinnonp
 from statsmodels.tsa.stattools import *
 
 from ..utils import *
@@ -35,63 +36,149 @@ def plot_ar_one_process():
 
 # In[ ]:
 
+def _autocorr(x, max_lag):
+    """sum_t x[t] * x[t - j] For j = 0..max_lag And Every Column, Via FFT"""
+    nfft = 1 << int(2 * len(x) - 1).bit_length()
+    f = np.fft.rfft(x, n=nfft, axis=0)
+    return np.fft.irfft(f * np.conj(f), n=nfft, axis=0)[:max_lag + 1]
+
+
+def _lagged_diff_sums(log_prices, lags):
+    """
+    Sum And Sum Of Squares Of log_prices[t] - log_prices[t - lag] For Every Lag & Column.
+
+    Uses cumulative sums of the levels and their squares plus one autocorrelation, so the
+    cost does not grow with the number of lags.
+    """
+    x = log_prices - log_prices.mean(axis=0)  # Differences are unchanged by centring
+    n = len(x)
+    lags = np.asarray(lags)
+    c1 = np.concatenate([np.zeros((1, x.shape[1])), np.cumsum(x, axis=0)])
+    c2 = np.concatenate([np.zeros((1, x.shape[1])), np.cumsum(x * x, axis=0)])
+    ac = _autocorr(x, lags.max())
+
+    s = (c1[n] - c1[lags]) - c1[n - lags]
+    ss = (c2[n] - c2[lags]) + c2[n - lags] - 2 * ac[lags]
+    return s, ss, (n - lags)[:, np.newaxis]
+
+
+def hurst_matrix(prices, lags=100):
+    """Hurst Coefficient Of Every Column, From Variances Of Lagged Log Differences"""
+    values, names = as_matrix(prices)
+    rng = np.arange(2, lags)
+    s, ss, n = _lagged_diff_sums(np.log(values), rng)
+    tau = ss / n - np.square(s / n)
+
+    """Slope of log(tau) on log(lag), all columns at once"""
+    x = np.log(rng) - np.log(rng).mean()
+    y = np.log(tau)
+    slope = (x[:, np.newaxis] * (y - y.mean(axis=0))).sum(axis=0) / (x * x).sum()
+    return pd.Series(slope / 2, index=names)
+
+
 def hurst_stat(ts, lags=100):
     """Computes hurst coefficient and variance ratio test statistics"""
-    rng = range(2, lags)
-    ts = np.log(ts)
-    tau = [np.var(np.subtract(ts[lag:], ts[:-lag])) for lag in rng]
-    poly = np.polyfit(np.log(rng), np.log(tau), 1)
-
-    # test_stat = np.var(np.subtract(ts[lags:], ts[:-lags])) / (lags * np.var(np.subtract(ts[1:], ts[:-1])))
-    return poly[0] / 2  # , test_stat
+    return hurst_matrix(ts, lags).iloc[0]
 
 
-def ratio_test(prices, k=5):
-    """Borrowed from https://mingze-gao.com/measures/lomackinlay1988/"""
+def variance_ratio_matrix(prices, ks):
+    """
+    Lo-MacKinlay Variance Ratio For Every k In ks And Every Column Of A (T, N) Price Matrix.
 
-    log_prices = np.log(prices)
-    rets = np.diff(log_prices)
+    Returns a tidy DataFrame of the ratio and its z-statistics under homoskedasticity and
+    heteroskedasticity (same definitions as ratio_test).
+    """
+    values, names = as_matrix(prices)
+    ks = np.atleast_1d(np.asarray(ks))
+    log_prices = np.log(values)
+    rets = np.diff(log_prices, axis=0)
     T = len(rets)
-    mu = np.mean(rets)
-    var_1 = np.var(rets, ddof=1, dtype=np.float64)
-    rets_k = (log_prices - np.roll(log_prices, k))[k:]
-    m = k * (T - k + 1) * (1 - k / T)
-    var_k = 1 / m * np.sum(np.square(rets_k - k * mu))
+    mu = rets.mean(axis=0)
+    var_1 = rets.var(axis=0, ddof=1)
 
-    # Variance Ratio
+    """Variance of k period returns"""
+    s, ss, n = _lagged_diff_sums(log_prices, ks)
+    k = ks[:, np.newaxis].astype(float)
+    m = k * (T - k + 1) * (1 - k / T)
+    var_k = (ss - 2 * k * mu * s + n * np.square(k * mu)) / m
     vr = var_k / var_1
 
-    # Phi1
     phi1 = 2 * (2 * k - 1) * (k - 1) / (3 * k * T)
 
-    # Phi2
-    def delta(j):
-        res = 0
-        for t in range(j + 1, T + 1):
-            t -= 1  # array index is t-1 for t-th element
-            res += np.square((rets[t] - mu) * (rets[t - j] - mu))
-        return res / ((T - 1) * var_1) ** 2
+    """delta(j) is the lag-j autocorrelation of squared demeaned returns"""
+    delta = _autocorr(np.square(rets - mu), ks.max()) / np.square((T - 1) * var_1)
+    j = np.arange(ks.max())[np.newaxis, :]
+    weights = np.where((j >= 1) & (j < ks[:, np.newaxis]), np.square(2 * (ks[:, np.newaxis] - j) / ks[:, np.newaxis]),
+                       0)
+    phi2 = weights @ delta[:ks.max()]
 
-    phi2 = 0
-    for j in range(1, k):
-        phi2 += (2 * (k - j) / k) ** 2 * delta(j)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_homo = (vr - 1) / np.sqrt(phi1)
+        z_hetero = (vr - 1) / np.sqrt(phi2)
 
-    return vr, (vr - 1) / np.sqrt(phi1), (vr - 1) / np.sqrt(phi2)
+    return pd.DataFrame({"series": np.tile(names, len(ks)), "k": np.repeat(ks, len(names)), "vr": vr.ravel(),
+                         "z_homo": z_homo.ravel(), "z_hetero": z_hetero.ravel()})
 
 
-def adf_test(ts):
-    """Computes ADF slope coefficient and its p-value"""
-    diff = np.diff(ts)
-    slope, intercept, r_value, p_value, std_err = scipy.stats.linregress(ts[:-1], diff)
-    result = adfuller(ts, regression="c", maxlag=0)
+def ratio_test(prices, k=5):
+    """Borrowed from https://mingze-gao.com/measures/lomackinlay1988/"""
+    res = variance_ratio_matrix(prices, [k]).iloc[0]
+    return res["vr"], res["z_homo"], res["z_hetero"]
+
+
+def adf_matrix(data, lags=0):
     """
-    print('ADF Statistic: %f' % result[0])
-    print('p-value: %f' % result[1])
-    print('Critical Values:')
-    #print(f"slope: {slope}, stat:{slope/std_err}, pval:{p_value}, r:{r_value}, stderr:{std_err}")
+    ADF Regression For Every Column Of A (T, N) Matrix At Once.
+
+    Regresses diff(y)_t on a constant, y_{t-1} and `lags` lagged differences by batched
+    least squares. NaNs are dropped per column first, as with dropna(). Returns a
+    DataFrame with the slope on y_{t-1} (rho), its t-statistic, MacKinnon p-value, half
+    life and observation count.
     """
-    print(f"rho: {slope:0.3f}, adf-test pValue: {result[1]:0.3f}")
-    return slope, result[1]
+    y, names = as_matrix(data)
+
+    """Move each column's NaNs to the end, keeping the order of the remaining values"""
+    y = np.take_along_axis(y, np.argsort(np.isnan(y), axis=0, kind="stable"), axis=0)
+
+    dy = np.diff(y, axis=0)
+    target = dy[lags:]
+    level = y[lags:-1]
+    level = level - np.nanmean(level, axis=0)  # Centred for conditioning, rho is unaffected
+    regressors = [np.ones_like(level), level] + [dy[lags - j:len(dy) - j] for j in range(1, lags + 1)]
+    X = np.stack(regressors, axis=-1)
+
+    valid = ~(np.isnan(target) | np.isnan(X).any(axis=-1))
+    X = np.where(valid[..., np.newaxis], X, 0)
+    target = np.where(valid, target, 0)
+    nobs = valid.sum(axis=0)
+    k = X.shape[-1]
+
+    """Normal equations, one small (k, k) system per column"""
+    xtx = np.einsum("tnk,tnl->nkl", X, X)
+    xty = np.einsum("tnk,tn->nk", X, target)
+    usable = nobs > k
+    xtx[~usable] = np.eye(k)
+    xtx_inv = np.linalg.inv(xtx)
+    beta = np.einsum("nkl,nl->nk", xtx_inv, xty)
+
+    resid = target - np.einsum("tnk,nk->tn", X, beta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s2 = np.square(resid).sum(axis=0) / (nobs - k)
+        rho = np.where(usable, beta[:, 1], np.nan)
+        t_stat = rho / np.sqrt(s2 * xtx_inv[:, 1, 1])
+        half_life = np.where(rho < 0, -math.log(2) / rho, np.nan)
+    p_value = np.array([mackinnonp(i, regression="c", N=1) if np.isfinite(i) else np.nan for i in t_stat])
+
+    return pd.DataFrame({"rho": rho, "t_stat": t_stat, "p_value": p_value, "half_life": half_life, "nobs": nobs},
+                        index=names)
+
+
+def adf_test(ts, quiet=False):
+    """Computes ADF slope coefficient and its p-value"""
+    result = adf_matrix(np.asarray(ts, dtype=float)).iloc[0]
+    if not quiet:
+        print(f"rho: {result['rho']:0.3f}, adf-test pValue: {result['p_value']:0.3f}")
+    return result["rho"], result["p_value"]
 
 
 def stationarity_analysis(data, adf_sig_level):
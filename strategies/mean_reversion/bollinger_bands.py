@@ -5,40 +5,83 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 
 from .cointegration import adf_test, johansen_cointegration
+from ..backtest import backtest
 from ..utils import *
 
 
 # In[ ]:
 
+def hysteresis_state(enter, leave):
+    """
+    Vectorized Entry/Exit State Machine.
+
+    Equivalent to walking the bars with a flat/in-position state: a bar satisfying only
+    `enter` opens (or keeps) the position, one satisfying only `leave` closes it, and a bar
+    satisfying both flips the current state. Time runs along axis 0, any trailing axes are
+    independent paths.
+    """
+    enter = np.asarray(enter, dtype=bool)
+    leave = np.asarray(leave, dtype=bool)
+    enter, leave = np.broadcast_arrays(enter, leave)
+
+    is_set = enter ^ leave
+    flips = np.cumsum(enter & leave, axis=0)
+
+    """Index (and flip count) of the last bar that set the state explicitly"""
+    t = np.arange(enter.shape[0]).reshape((-1,) + (1,) * (enter.ndim - 1))
+    last_set = np.maximum.accumulate(np.where(is_set, t, -1), axis=0)
+    has_set = last_set >= 0
+    last_set = np.maximum(last_set, 0)
+
+    value = np.where(has_set, np.take_along_axis(enter, last_set, axis=0), False)
+    flips_at_set = np.where(has_set, np.take_along_axis(flips, last_set, axis=0), 0)
+
+    return (value ^ ((flips - flips_at_set) % 2).astype(bool)).astype(int)
+
+
+def _expand_thresholds(z, *thresholds):
+    """
+    Broadcast (T, ...) Z Against The Thresholds.
+
+    Convention of the vectorized strategy functions: each threshold is a scalar or a 1-D
+    vector of length K (one entry per parameter set); vectors add a trailing axis of size
+    K to the result, so a whole grid is evaluated in one call.
+    """
+    z = np.asarray(z, dtype=float)
+    thresholds = np.broadcast_arrays(*[np.asarray(i, dtype=float) for i in thresholds])
+    if thresholds[0].ndim > 0:
+        z = z[..., np.newaxis]
+    return z, thresholds
+
+
+def long_signal(z, entry_score, exit_score):
+    """Long State: Enter When Z < entry_score, Exit When Z >= exit_score"""
+    z, (entry_score, exit_score) = _expand_thresholds(z, entry_score, exit_score)
+    return hysteresis_state(z < entry_score, z >= exit_score)
+
+
+def short_signal(z, entry_score, exit_score):
+    """Short State: Enter When Z > entry_score, Exit When Z <= exit_score"""
+    z, (entry_score, exit_score) = _expand_thresholds(z, entry_score, exit_score)
+    return hysteresis_state(z > entry_score, z <= exit_score)
+
+
+def bollinger_signals(z, long_entry=-1, long_exit=-0.5, short_entry=1, short_exit=0.5):
+    """Long (L) And Short (S) States Of A (T,) Or (T, N) Z Array, Thresholds As In _expand_thresholds"""
+    z, (long_entry, long_exit, short_entry, short_exit) = _expand_thresholds(
+        z, long_entry, long_exit, short_entry, short_exit)
+    longs = hysteresis_state(z < long_entry, z >= long_exit)
+    shorts = hysteresis_state(z > short_entry, z <= short_exit)
+    return longs, shorts
+
+
 def fill_signal_long(df, entry_score, exit_score):
-    state = 0
-    df["L"] = 0
-
-    for i in range(len(df)):
-        if df.iloc[i]["Z"] < entry_score and state == 0:
-            df.at[i, "L"] = 1
-            state = 1
-        elif df.iloc[i]["Z"] >= exit_score and state == 1:
-            df.at[i, "L"] = -1
-            state = 0
-
-    df["L"] = df["L"].cumsum()
+    df["L"] = long_signal(df["Z"].values, entry_score, exit_score)
     return df
 
 
 def fill_signal_short(df, entry_score, exit_score):
-    state = 0
-    df["S"] = 0
-
-    for i in range(len(df)):
-        if df.iloc[i]["Z"] > entry_score and state == 0:
-            df.at[i, "S"] = 1
-            state = 1
-        elif df.iloc[i]["Z"] <= exit_score and state == 1:
-            df.at[i, "S"] = -1
-            state = 0
-
-    df["S"] = df["S"].cumsum()
+    df["S"] = short_signal(df["Z"].values, entry_score, exit_score)
     return df
 
 
@@ -73,6 +116,24 @@ def bollinger_bands(df, long_entry=-1, long_exit=-0.5, short_entry=1, short_exit
             return df["RT"]
 
 
+def bollinger_bands_returns(prices, long_entry=-1, long_exit=-0.5, short_entry=1, short_exit=0.5, window=7):
+    """bollinger_bands Returns (Same Rows Kept) For A (T,) Or (T, N) Price Array Without NaNs"""
+    prices = np.asarray(prices, dtype=float)
+    rolling = pd.DataFrame(prices.reshape(len(prices), -1)).rolling(window=window)
+    z = ((prices.reshape(len(prices), -1) - rolling.mean().values) / rolling.std().values).reshape(prices.shape)
+
+    """Fill Entry/Exit Signals based on Z Score"""
+    longs, shorts = bollinger_signals(z[window - 1:], long_entry, long_exit, short_entry, short_exit)
+
+    """Return"""
+    ret = prices[window:] / prices[window - 1:-1] - 1
+    if longs.ndim > ret.ndim:
+        ret = ret[..., np.newaxis]
+
+    """Strategy Return"""
+    return (longs - shorts)[:-1] * ret
+
+
 def bollinger_bands_long_short_portfolio(df, ticker_x, ticker_y, evec, long_entry, long_exit, short_entry, short_exit,
                                          window):
     """Make stationary Series And Compute Z Score"""
@@ -87,17 +148,14 @@ def bollinger_bands_long_short_portfolio(df, ticker_x, ticker_y, evec, long_entr
     df = fill_signal_long(df, long_entry, long_exit)
     df = fill_signal_short(df, short_entry, short_exit)
 
-    """Positions (Capital Invested)"""
-    positions = ["pos_" + i for i in cols]
-    df[positions] = df[cols].mul(evec, axis=1)
-    # df[positions] = df[positions].mul(df["L"] - df["S"], axis=0)
-
-    """P&L and Return"""
-    df["UnitPnL"] = np.sum(df[positions].values * df[cols].pct_change().shift(-1).values, axis=1)
+    """Positions (Capital Invested) Of One Unit Of The Portfolio"""
+    prices = df[cols].values
+    unit = backtest(prices * evec, prices)
 
-    """Return = PnL/Capital Invested"""
-    df["UnitReturn"] = df["UnitPnL"] / (df[positions].abs().sum(axis=1))
-    df["BBReturn"] = (df["L"] - df["S"]) * df["UnitReturn"]
+    """Return = PnL/Capital Invested In One Unit"""
+    signal = (df["L"] - df["S"]).values[:, np.newaxis]
+    df["UnitReturn"] = unit.returns
+    df["BBReturn"] = backtest(signal * prices * evec, prices, capital=unit.gross).returns
 
     plt.plot((1 + df["BBReturn"]).cumprod(), label="BB Returns")
     plt.plot((1 + df["UnitReturn"]).cumprod(), label="Stationary Portfolio Return")
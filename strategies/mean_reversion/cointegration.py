@@ -2,9 +2,10 @@
 import os
 
 import matplotlib.pyplot as plt
-from statsmodels.tsa.vector_ar.vecm import coint_johansen
 
-from .adf_and_hurst import adf_test
+from .adf_and_hurst import adf_matrix, adf_test
+from ..backtest import backtest
+from ..memo import cached_coint_johansen
 from ..utils import *
 
 
@@ -29,7 +30,7 @@ def simple_linear_regression(df, x, y):
 
 
 def johansen_cointegration(df, ticker_one, ticker_two):
-    jres = coint_johansen(df[[ticker_one, ticker_two]], det_order=0, k_ar_diff=1)
+    jres = cached_coint_johansen(df[[ticker_one, ticker_two]], det_order=0, k_ar_diff=1)
 
     summary = []
 
@@ -77,12 +78,12 @@ def const_beta_pair_mean_reversion_strategy(df, ticker_one, ticker_two, evec, wi
     df = df.dropna(how="any")[:-1]
 
     """Positions (Capital Invested)"""
-    positions = ["pos_" + i for i in cols]
-    df[positions] = (df[cols].mul(evec, axis=1)).mul(df["Z"], axis=0)
+    positions = df[cols].values * evec * df[["Z"]].values
 
     """P&L and Return"""
-    df["PnL"] = np.sum(df[positions].values * df[cols].pct_change().shift(-1).values, axis=1)
-    df["Return"] = df["PnL"] / (df[positions].abs().sum(axis=1))
+    res = backtest(positions, df[cols].values)
+    df["PnL"] = res.pnl
+    df["Return"] = res.returns
 
     # print_df(df, n=10)
     plt.style.use('seaborn-bright')
@@ -98,6 +99,20 @@ def const_beta_pair_mean_reversion_strategy(df, ticker_one, ticker_two, evec, wi
     return df
 
 
+def portfolio_mean_reversion_returns(prices, weights, window):
+    """
+    const_beta_pair_mean_reversion_strategy On A (T, n) Price Array.
+
+    Holds -Z units of the portfolio prices @ weights, Z being its rolling z-score over
+    window bars. weights is (n,) or (T, n) for time varying weights (e.g. rolling_johansen
+    eigenvectors). Returns the (T,) strategy returns, NaN for the first window - 1 bars
+    and the last one.
+    """
+    prices = np.asarray(prices, dtype=float)
+    z = -rolling_z(pd.Series(np.sum(prices * weights, axis=-1)), window).values
+    return backtest(prices * weights * z[:, np.newaxis], prices).returns
+
+
 # In[ ]:
 def main():
     ticker_one = "AUS_IDX_SNP_ASX"
@@ -124,17 +139,15 @@ def main():
 
     """Generate stationary time series from results above"""
     df_t = generate_stationary_series(df, ticker_one, ticker_two, coint_test_res, beta)
-    slopes = []
+    adf_res = adf_matrix(df_t)
+    print_df(adf_res)
     for portfolio in df_t.columns:
-        print(portfolio)
-        slope, p_val = adf_test(df_t[portfolio])
-        slopes.append(slope)
         plt.plot(df_t[portfolio], label=portfolio)
     plt.title("Stationary Portfolios")
     plt.legend()
     plt.show()
 
-    half_life = int(-math.log(2) / slopes[0])
+    half_life = int(-math.log(2) / adf_res["rho"].iloc[0])
 
     const_beta_pair_mean_reversion_strategy(df, ticker_one, ticker_two, coint_test_res.evec[0],
                                             min(half_life, 90))
@@ -0,0 +1,112 @@
+# In[ ]
+from itertools import combinations
+
+from statsmodels.tsa.adfvalues import mackinnonp
+
+from ..memo import cached_coint
+from ..utils import *
+
+MIN_COINT_OBS = 20
+
+
+# In[ ]
+def _masked_slr(x, y, valid):
+    """Column-wise SLR Of y On x Over Rows Where valid, Returns (slope, intercept, t-stat Of Slope, n)"""
+    n = valid.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = np.where(valid, x, 0).sum(axis=0) / n
+        y_mean = np.where(valid, y, 0).sum(axis=0) / n
+        xd = np.where(valid, x - x_mean, 0)
+        yd = np.where(valid, y - y_mean, 0)
+        sxx = (xd * xd).sum(axis=0)
+        slope = (xd * yd).sum(axis=0) / sxx
+        intercept = y_mean - slope * x_mean
+        ssr = np.square(np.where(valid, yd - slope * xd, 0)).sum(axis=0)
+        t_stat = slope / np.sqrt(ssr / (n - 2) / sxx)
+    return slope, intercept, t_stat, n
+
+
+def prescreen_pairs(values, pairs):
+    """
+    Cheap Engle-Granger First Stage For Many (y, x) Column Pairs At Once.
+
+    Fits y on x by OLS, then regresses the change in the residual spread on its lagged
+    level (lag-0 Dickey-Fuller). Returns hedge ratio, that regression's t-stat, its
+    approximate MacKinnon p-value and the spread's half life for every pair.
+    """
+    pairs = np.asarray(pairs)
+    y = values[:, pairs[:, 0]]
+    x = values[:, pairs[:, 1]]
+    valid = ~(np.isnan(x) | np.isnan(y))
+    beta, alpha, _, _ = _masked_slr(x, y, valid)
+
+    """Residual spread and its lag-1 regression"""
+    spread = np.where(valid, y - alpha - beta * x, np.nan)
+    lagged = spread[:-1]
+    diff = spread[1:] - lagged
+    rho, _, t_stat, n = _masked_slr(lagged, diff, ~(np.isnan(lagged) | np.isnan(diff)))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        half_life = np.where(rho < 0, -np.log(2) / rho, np.nan)
+    t_stat[n < 3] = np.nan
+    p_value = np.array([mackinnonp(i, regression="c", N=2) if np.isfinite(i) else np.nan for i in t_stat])
+    return beta, t_stat, p_value, half_life
+
+
+def _coint_pair(pair):
+    """Exact Engle-Granger Test On One (y, x) Column Pair Of The Worker's Price Matrix, NaN If Too Few Rows"""
+    values = worker_shared()
+    y = values[:, pair[0]]
+    x = values[:, pair[1]]
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if valid.sum() < MIN_COINT_OBS:
+        return np.nan, np.nan
+    t_stat, p_value, _ = cached_coint(y[valid], x[valid])
+    return t_stat, p_value
+
+
+def cointegration_scan(df, pairs=None, prescreen_pvalue=0.2, max_workers=None, chunk_size=1000):
+    """
+    Rank (y, x) Pairs By Engle-Granger Cointegration p-value.
+
+    pairs defaults to every combination of df's columns. The vectorized prescreen runs on
+    chunks of chunk_size pairs; only pairs whose lag-0 p-value is below prescreen_pvalue
+    (None keeps all) get the exact statsmodels coint test, spread over a process pool
+    that receives the price matrix once per worker. Pairs overlapping on fewer than
+    MIN_COINT_OBS rows (e.g. a ticker listed late or never) get NaN statistics.
+    """
+    columns = list(df.columns)
+    if pairs is None:
+        pairs = list(combinations(columns, 2))
+    position = {col: i for i, col in enumerate(columns)}
+    idx = [(position[y], position[x]) for y, x in pairs]
+    values = df.values.astype(float)
+
+    """First stage"""
+    stats = [prescreen_pairs(values, idx[i:i + chunk_size]) for i in range(0, len(idx), chunk_size)]
+    beta, t_stat, p_value, half_life = (np.concatenate(i) for i in zip(*stats))
+
+    result = pd.DataFrame({"y": [y for y, _ in pairs], "x": [x for _, x in pairs], "hedge_ratio": beta,
+                           "prescreen_tstat": t_stat, "prescreen_pvalue": p_value, "half_life": half_life})
+    if prescreen_pvalue is not None:
+        result = result[result["prescreen_pvalue"] < prescreen_pvalue]
+
+    """Exact test on survivors"""
+    survivors = [idx[i] for i in result.index]
+    tests = pool_map(_coint_pair, survivors, shared=values, max_workers=max_workers,
+                     chunksize=max(1, len(survivors) // 64))
+
+    result["coint_tstat"] = [i[0] for i in tests]
+    result["p_value"] = [i[1] for i in tests]
+    return result.sort_values("p_value").reset_index(drop=True)
+
+
+# In[ ]
+def main():
+    df = read_df("./data/equity/NIFTY_100_STOCKS_Close.csv")
+    result = cointegration_scan(df)
+    print_df(result, 20)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # In[ ]
 from matplotlib import pyplot as plt
 
+from ..backtest import backtest
 from ..utils import *
 
 
@@ -8,22 +9,20 @@ from ..utils import *
 def cross_sectional_mean_reversion(df):
     print_dashed_line()
 
-    tickers = df.columns
-    weights = ["weight_" + i for i in tickers]
-
     """Mean return of all stocks"""
-    mean_ret = df.pct_change().mean(axis=1)
+    ret = df.pct_change()
+    mean_ret = ret.mean(axis=1)
 
     "Deviation from mean return"
-    diff_ret = df.pct_change().subtract(mean_ret, axis=0)
+    diff_ret = ret.subtract(mean_ret, axis=0)
 
     """Weight = -(r-<r>)/sum(abs(r-<r>))"""
-    df[weights] = -diff_ret.div(diff_ret.abs().sum(axis=1), axis=0)
-    df["mean_return"] = mean_ret
+    weights = -diff_ret.div(diff_ret.abs().sum(axis=1), axis=0)
 
-    """Return = Weight * % Change"""
-    df["strategy_return"] = np.sum(df[weights].values * df[tickers].pct_change().shift(-1).values, axis=1)
-    df = df.dropna(how='any')
+    """Return = Weight * % Change (weights already sum to one unit of capital)"""
+    res = backtest(weights.values, df.values)
+    df = pd.DataFrame({"strategy_return": res.pnl, "mean_return": mean_ret}, index=df.index)
+    df = df.dropna(how="any")
 
     plt.plot((1 + df["strategy_return"]).cumprod(), label="Strategy Cumulative Return")
     plt.plot((1 + df["mean_return"]).cumprod(), label="Equal Weight Portfolio Cumulative Return")
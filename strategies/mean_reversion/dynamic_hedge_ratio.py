@@ -3,8 +3,8 @@ import os
 from pathlib import Path
 
 from matplotlib import pyplot as plt
-from pykalman import KalmanFilter
 
+from ..backtest import backtest
 from ..mean_reversion.adf_and_hurst import adf_test
 from ..utils import *
 
@@ -12,35 +12,102 @@ from ..utils import *
 # In[ ]
 def calculate_beta_ols(df, ticker_x, ticker_y, lookback, series_type="Close"):
     """Calculate SLR Beta Using A Lookback Period"""
-    df["x"] = 0.0
-    for i in range(lookback, len(df)):
-        df_temp = df.iloc[i - lookback:i]
-        df["x"][i] = -get_slr_coeff(df_temp[ticker_x + "_" + series_type], df_temp[ticker_y + "_" + series_type])
-
+    slope, _ = rolling_slr_coeff(df[ticker_x + "_" + series_type].values, df[ticker_y + "_" + series_type].values,
+                                 lookback)
+    slope[:lookback] = 0.0
+    df["x"] = -slope
     df["y"] = 1
     return df
 
 
+class KalmanHedgeRatio:
+    """
+    Two State (Beta, Intercept) Kalman Filter For y_t = beta_t * x_t + alpha_t + noise.
+
+    State follows a random walk with covariance delta / (1 - delta) * I, as in Chan's book.
+    All arithmetic is elementwise, so x_t / y_t / delta may be arrays and every element is
+    an independent filter (e.g. x_t of shape (P, 1) with delta of shape (D,) runs P pairs
+    x D deltas). Call update() once per bar; state is kept between calls.
+    """
+
+    def __init__(self, delta=1e-5, observation_covariance=1.0):
+        delta = np.asarray(delta, dtype=float)
+        self.transition_covariance = delta / (1 - delta)
+        self.observation_covariance = observation_covariance
+        self.state_mean = None
+        self.state_cov = None
+
+    def _init_state(self, shape):
+        shape = np.broadcast_shapes(shape, self.transition_covariance.shape)
+        self.state_mean = np.zeros(shape + (2,))
+        self.state_cov = np.ones(shape + (2, 2))
+
+    def update(self, x_t, y_t):
+        """Filter One Bar. Returns (state mean, forecast error e, forecast variance Q)"""
+        x_t = np.asarray(x_t, dtype=float)
+        y_t = np.asarray(y_t, dtype=float)
+        if self.state_mean is None:
+            """First bar is corrected against the initial state without a prediction step"""
+            self._init_state(np.broadcast_shapes(x_t.shape, y_t.shape))
+        else:
+            self.state_cov[..., 0, 0] += self.transition_covariance
+            self.state_cov[..., 1, 1] += self.transition_covariance
+
+        m = self.state_mean
+        p = self.state_cov
+
+        """Forecast y_t, its error and variance"""
+        e = y_t - (m[..., 0] * x_t + m[..., 1])
+        ph0 = p[..., 0, 0] * x_t + p[..., 0, 1]
+        ph1 = p[..., 1, 0] * x_t + p[..., 1, 1]
+        q = ph0 * x_t + ph1 + self.observation_covariance
+
+        """Kalman gain and correction"""
+        k0 = ph0 / q
+        k1 = ph1 / q
+        hp0 = p[..., 0, 0] * x_t + p[..., 1, 0]
+        hp1 = p[..., 0, 1] * x_t + p[..., 1, 1]
+        m[..., 0] += k0 * e
+        m[..., 1] += k1 * e
+        p[..., 0, 0] -= k0 * hp0
+        p[..., 0, 1] -= k0 * hp1
+        p[..., 1, 0] -= k1 * hp0
+        p[..., 1, 1] -= k1 * hp1
+
+        return m.copy(), e, q
+
+
+def kalman_hedge_ratio(x, y, delta=1e-5, observation_covariance=1.0):
+    """
+    Run KalmanHedgeRatio Over Whole Series.
+
+    x, y are (T,) or (P, T) with time on the last axis, delta a scalar or (D,) vector.
+    Returns state means of shape (P, D, T, 2) (beta, intercept), and forecast error and
+    variance of shape (P, D, T); the P / D axes are dropped for 1-D x, y or scalar delta.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if np.ndim(delta) > 0:
+        x = x[..., np.newaxis, :]
+        y = y[..., np.newaxis, :]
+
+    kf = KalmanHedgeRatio(delta, observation_covariance)
+    state_means, errors, variances = [], [], []
+    for t in range(x.shape[-1]):
+        m, e, q = kf.update(x[..., t], y[..., t])
+        state_means.append(m)
+        errors.append(e)
+        variances.append(q)
+
+    return np.stack(state_means, axis=-2), np.stack(errors, axis=-1), np.stack(variances, axis=-1)
+
+
 def calculate_beta_kalman(df, ticker_one, ticker_two, series_type="Close"):
     """Use Kalman Filter To Dynamically Calculate Beta"""
     x = df[ticker_one + "_" + series_type].values
     y = df[ticker_two + "_" + series_type].values
-    delta = 1e-5
-    trans_cov = delta / (1 - delta) * np.eye(2)
-    obs_mat = np.vstack([x, np.ones(x.shape)]).T[:, np.newaxis]
-
-    kf = KalmanFilter(
-        n_dim_obs=1,
-        n_dim_state=2,
-        initial_state_mean=np.zeros(2),
-        initial_state_covariance=np.ones((2, 2)),
-        transition_matrices=np.eye(2),
-        observation_matrices=obs_mat,
-        observation_covariance=1.0,
-        transition_covariance=trans_cov
-    )
-
-    state_means, state_covs = kf.filter(y)
+
+    state_means, _, _ = kalman_hedge_ratio(x, y, delta=1e-5)
 
     df["x"] = -state_means[:, 0]
     df["y"] = 1
@@ -58,15 +125,12 @@ def dynamic_beta_mean_reversion_strategy(df, ticker_x, ticker_y, window, series_
     df = df.dropna(how="any")[:-1]
 
     """Positions (Capital Invested)"""
-    positions = ["pos_" + i for i in cols]
-    df[positions] = df[cols].values * df[["x", "y"]].values
-    df[positions] = df[positions].mul(df["Z"], axis=0)
-
-    """P&L and Return"""
-    df["PnL"] = np.sum(df[positions].values * df[cols].pct_change().shift(-1).values, axis=1)
+    positions = df[cols].values * df[["x", "y"]].values * df[["Z"]].values
 
-    """Return = PnL/Capital Invested"""
-    df["Return"] = df["PnL"] / (df[positions].abs().sum(axis=1))
+    """P&L and Return = PnL/Capital Invested"""
+    res = backtest(positions, df[cols].values)
+    df["PnL"] = res.pnl
+    df["Return"] = res.returns
 
     plt.style.use('seaborn-bright')
     plt.plot(np.cumprod(1 + df["Return"]) - 1, label=f"Strategy Return, Window:{window}")
@@ -1,9 +1,9 @@
 # In[ ]
 
 from matplotlib import pyplot as plt
-from statsmodels.tsa.stattools import coint
-
+from .adf_and_hurst import adf_matrix
 from .cointegration import adf_test, const_beta_pair_mean_reversion_strategy
+from .cointegration_scan import cointegration_scan
 from ..utils import *
 
 
@@ -16,20 +16,15 @@ def index_arbitrage(df, index_ticker):
     adf_test(df[index_ticker])
 
     """Find cointegrated stocks (alpha = 0.1)"""
-    cointegrated_tickers = []
-    for ticker in df.columns:
-        if ticker == index_ticker:
-            continue
-        res = coint(df[ticker], df[index_ticker])
-        # print(f"{ticker}, p-value:{res[1]:0.3f}")
-        if res[1] < 0.1:
-            cointegrated_tickers.append(ticker)
+    pairs = [(ticker, index_ticker) for ticker in df.columns if ticker != index_ticker]
+    res = cointegration_scan(df, pairs, prescreen_pvalue=None)
+    cointegrated = set(res.loc[res["p_value"] < 0.1, "y"])
+    cointegrated_tickers = [ticker for ticker, _ in pairs if ticker in cointegrated]
 
     """Ensure cointegrated stocks are non stationary"""
     print_dashed_line()
-    for ticker in cointegrated_tickers:
-        print(f"Cointegrated ticker: {ticker}")
-        adf_test(df[ticker])
+    print("Cointegrated tickers")
+    print_df(adf_matrix(df[cointegrated_tickers]), len(cointegrated_tickers))
     print_dashed_line()
 
     df_index = df[index_ticker]
@@ -0,0 +1,136 @@
+# In[ ]
+from collections import namedtuple
+
+from statsmodels.tsa.coint_tables import c_sja, c_sjt
+
+from .cointegration import portfolio_mean_reversion_returns
+from ..utils import *
+
+
+# In[ ]
+def johansen_design(prices, k_ar_diff=1):
+    """
+    Rows [dX_t, X_t-k, dX_t-1, ..., dX_t-k] Of The Johansen Regression, Shape (T, n * (k + 2)).
+
+    The level is lagged k_ar_diff bars as in coint_johansen (for k_ar_diff >= 1 this is
+    equivalent to X_t-1 once the lagged differences are partialled out). Row t only
+    depends on bars t - k - 1..t, the first k + 1 rows are NaN. The Johansen test on bars
+    [a, b) uses rows [a + k_ar_diff + 1, b), so prefix_moments of this design give every
+    window's statistics by subtraction.
+    """
+    prices = np.asarray(prices, dtype=float)
+    n = prices.shape[1]
+    diff = np.full(prices.shape, np.nan)
+    diff[1:] = np.diff(prices, axis=0)
+
+    design = np.full((len(prices), n * (k_ar_diff + 2)), np.nan)
+    design[:, :n] = diff
+    design[k_ar_diff + 1:, n:2 * n] = prices[1:len(prices) - k_ar_diff]
+    for lag in range(1, k_ar_diff + 1):
+        design[lag:, (lag + 1) * n:(lag + 2) * n] = diff[:-lag]
+    return design
+
+
+def johansen_from_moments(moments, neqs, det_order=0):
+    """
+    Johansen Eigenvalues & Eigenvectors From Moments Of johansen_design, Batched.
+
+    moments is (..., K + 1, K + 1) from window_moments. The lagged differences are partialled
+    out of the moment matrix to get S00, S01 and S11, then S10 S00^-1 S01 v = lambda S11 v
+    is solved through a Cholesky factor of S11. Matches coint_johansen (det_order 0 or -1):
+    eigenvalues descending, eigenvectors in the columns with v' S11 v = 1, except every
+    vector is signed so its first element is positive. Returns (eig, evec, nobs).
+    """
+    if det_order not in (-1, 0):
+        raise ValueError("Only det_order -1 (no constant) and 0 (constant) are supported")
+    cov, _, nobs = moments_cov(moments, demean=det_order == 0)
+
+    """Residual moments after regressing on the lagged differences"""
+    a = cov[..., :2 * neqs, :2 * neqs]
+    if cov.shape[-1] > 2 * neqs:
+        lag = cov[..., 2 * neqs:, 2 * neqs:]
+        cross = cov[..., 2 * neqs:, :2 * neqs]
+        a = a - np.swapaxes(cross, -1, -2) @ np.linalg.solve(lag, cross)
+    s00 = a[..., :neqs, :neqs]
+    s10 = a[..., neqs:, :neqs]
+    s11 = a[..., neqs:, neqs:]
+
+    """Symmetric form L^-1 S10 S00^-1 S01 L^-T of the generalized eigenproblem"""
+    chol = np.linalg.cholesky(s11)
+    b = np.linalg.solve(chol, s10)
+    c = b @ np.linalg.solve(s00, np.swapaxes(b, -1, -2))
+    eig, u = np.linalg.eigh((c + np.swapaxes(c, -1, -2)) / 2)
+    evec = np.linalg.solve(np.swapaxes(chol, -1, -2), u)
+
+    eig = eig[..., ::-1]
+    evec = evec[..., ::-1]
+    evec = evec * np.where(evec[..., :1, :] < 0, -1, 1)
+    return eig, evec, nobs
+
+
+def johansen_trace_stats(eig, nobs):
+    """Trace (r <= i) And Max Eigenvalue Statistics For Every Eigenvalue Set"""
+    log_eig = np.log(1 - eig)
+    nobs = np.asarray(nobs)[..., np.newaxis]
+    trace = -nobs * np.cumsum(log_eig[..., ::-1], axis=-1)[..., ::-1]
+    max_eig = -nobs * log_eig
+    return trace, max_eig
+
+
+RollingJohansenResult = namedtuple("RollingJohansenResult", ["eig", "evec", "trace_stat", "max_eig_stat",
+                                                             "trace_stat_crit_vals", "max_eig_stat_crit_vals"])
+
+
+def rolling_johansen(prices, window, k_ar_diff=1, det_order=0):
+    """
+    Johansen Test On Every Trailing Window Of A (T, n) Price Matrix.
+
+    The value at bar i is estimated on bars [i - window, i), as coint_johansen on that
+    slice would; bars without a full window of valid data are NaN. The moment matrix is
+    slid one bar at a time by adding the new row's cross-products and dropping the oldest
+    (running sums), then S00, S01, S11 and the n x n eigenproblem are solved for all bars
+    in one batch. Returns eig (T, n), evec (T, n, n) with vectors in the columns,
+    trace_stat and max_eig_stat (T, n) plus the (n, 3) 90/95/99% critical values.
+    """
+    prices = np.asarray(prices, dtype=float)
+    length, neqs = prices.shape
+    if det_order == 0:
+        prices = prices - np.nanmean(prices, axis=0)
+
+    prefix = prefix_moments(johansen_design(prices, k_ar_diff))
+    end = np.arange(window, length)
+    moments = window_moments(prefix, end - window + k_ar_diff + 1, end)
+    full = moments[:, 0, 0] == window - k_ar_diff - 1
+
+    eig = np.full((length, neqs), np.nan)
+    evec = np.full((length, neqs, neqs), np.nan)
+    nobs = np.full(length, np.nan)
+    eig[end[full]], evec[end[full]], nobs[end[full]] = johansen_from_moments(moments[full], neqs, det_order)
+    trace_stat, max_eig_stat = johansen_trace_stats(eig, nobs)
+
+    trace_crit = np.array([c_sjt(neqs - i, det_order) for i in range(neqs)])
+    max_eig_crit = np.array([c_sja(neqs - i, det_order) for i in range(neqs)])
+    return RollingJohansenResult(eig, evec, trace_stat, max_eig_stat, trace_crit, max_eig_crit)
+
+
+# In[ ]
+def main():
+    tickers = ["AXISBANK", "HDFCBANK", "ICICIBANK", "KOTAKBANK", "SBIN"]
+    df = read_df("./data/equity/NIFTY_100_STOCKS_Close.csv", return_cols=tickers)
+    window = 250
+
+    res = rolling_johansen(df.values, window)
+    summary = pd.DataFrame(res.evec[:, :, 0], index=df.index, columns=tickers)
+    summary["eig"] = res.eig[:, 0]
+    summary["trace_stat"] = res.trace_stat[:, 0]
+    summary["coint_95"] = res.trace_stat[:, 0] > res.trace_stat_crit_vals[0, 1]
+    print_df(summary.dropna().tail(10), 10)
+    print(f"Share of windows with r > 0 at 95%: {summary['coint_95'][window:].mean():0.3f}")
+
+    """Trade the rolling first eigenvector"""
+    returns = portfolio_mean_reversion_returns(df.values, res.evec[:, :, 0], 20)
+    performance_summary(pd.Series(returns).dropna(), label="Rolling Johansen Basket")
+
+
+if __name__ == "__main__":
+    main()
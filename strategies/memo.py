@@ -0,0 +1,180 @@
+import functools
+import hashlib
+import os
+import pickle
+import sys
+from collections import OrderedDict
+
+from scipy.stats import pearson3
+from statsmodels.tsa.stattools import coint
+from statsmodels.tsa.vector_ar.vecm import coint_johansen
+
+from .utils import *
+
+MEMO_DIR = "./data/.memo_cache"
+
+
+def _hash_update(h, obj):
+    """Feed obj Into h: Arrays & Frames By Their Raw Bytes, Containers Recursively, Others By repr"""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        h.update(type(obj).__name__.encode())
+        _hash_update(h, obj.index.values)
+        if isinstance(obj, pd.DataFrame):
+            _hash_update(h, obj.columns.values)
+        obj = obj.values
+    if isinstance(obj, np.ndarray):
+        h.update(f"{obj.dtype}{obj.shape}".encode())
+        if obj.dtype == object:
+            h.update(repr(obj.tolist()).encode())
+        else:
+            h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for item in obj:
+            _hash_update(h, item)
+    elif isinstance(obj, dict):
+        for key in sorted(obj, key=repr):
+            _hash_update(h, key)
+            _hash_update(h, obj[key])
+    else:
+        h.update(repr(obj).encode())
+
+
+def _package_version(fn):
+    """Version Of The Package fn Comes From, So An Upgrade Invalidates Its Entries"""
+    package = sys.modules.get((getattr(fn, "__module__", None) or "").split(".")[0])
+    return getattr(package, "__version__", "")
+
+
+class Memo:
+    """
+    Content Addressed Memoization With An In-Process LRU Tier And A Disk Tier.
+
+    Keys hash the function name, its package version and the call arguments (array,
+    Series and DataFrame arguments by their raw bytes). Results are kept in an LRU of
+    max_entries and pickled to one file per key under directory; files are published by
+    atomic rename so concurrent process pool workers never read a partial entry. Once the
+    directory exceeds max_bytes the least recently used files are evicted down to 90% of
+    it. The directory size is tracked from this process's writes and only rescanned
+    (picking up other processes' writes) on the first write, every scan_every writes and
+    when evicting. Counts hits of both tiers and misses per function.
+    """
+
+    def __init__(self, directory=MEMO_DIR, max_bytes=256 * 2 ** 20, max_entries=256, scan_every=1000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.scan_every = scan_every
+        self.lru = OrderedDict()
+        self.counts = {}
+        self.disk_bytes = None
+        self.writes = 0
+
+    def key(self, name, args, kwargs):
+        h = hashlib.blake2b(name.encode(), digest_size=20)
+        _hash_update(h, args)
+        _hash_update(h, kwargs)
+        return h.hexdigest()
+
+    def _count(self, name, tier):
+        self.counts.setdefault(name, {"memory_hits": 0, "disk_hits": 0, "misses": 0})[tier] += 1
+
+    def _remember(self, key, value):
+        self.lru[key] = value
+        self.lru.move_to_end(key)
+        while len(self.lru) > self.max_entries:
+            self.lru.popitem(last=False)
+
+    def _read_disk(self, key):
+        path = os.path.join(self.directory, key + ".pkl")
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+            return True, value
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+
+    def _write_disk(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        with atomic_write(os.path.join(self.directory, key + ".pkl"), "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = f.tell()
+
+        self.writes += 1
+        if self.disk_bytes is None or self.writes % self.scan_every == 0:
+            self._evict()
+        else:
+            self.disk_bytes += size
+            if self.disk_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Scan The Directory, Drop Least Recently Used Files Down To 90% Of max_bytes Once Over It"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes if total <= self.max_bytes else 0.9 * self.max_bytes
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self.disk_bytes = total
+
+    def call(self, name, fn, *args, **kwargs):
+        key = self.key(name, args, kwargs)
+        if key in self.lru:
+            self.lru.move_to_end(key)
+            self._count(name, "memory_hits")
+            return self.lru[key]
+
+        found, value = self._read_disk(key)
+        if found:
+            self._count(name, "disk_hits")
+        else:
+            self._count(name, "misses")
+            value = fn(*args, **kwargs)
+            self._write_disk(key, value)
+        self._remember(key, value)
+        return value
+
+    def wrap(self, fn, name=None):
+        """Memoized Version Of fn (name Defaults To module.qualname, Pass One For Bound Methods)"""
+        name = f"{name or f'{fn.__module__}.{fn.__qualname__}'}@{_package_version(fn)}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return self.call(name, fn, *args, **kwargs)
+
+        return wrapper
+
+    def stats(self):
+        """Hit / Miss Counts Per Function In This Process"""
+        df = pd.DataFrame.from_dict(self.counts, orient="index", columns=["memory_hits", "disk_hits", "misses"])
+        df["hit_rate"] = (df["memory_hits"] + df["disk_hits"]) / df.sum(axis=1)
+        return df
+
+    def clear(self, disk=False):
+        self.lru.clear()
+        self.counts.clear()
+        if disk and os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                os.remove(entry.path)
+            self.disk_bytes = 0
+
+
+memo = Memo()
+
+cached_coint_johansen = memo.wrap(coint_johansen)
+cached_coint = memo.wrap(coint)
+cached_pearson3_fit = memo.wrap(pearson3.fit, name="scipy.stats.pearson3.fit")
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from .utils import as_matrix
+
+TRADING_DAYS = 252
+
+
+def _longest_run(mask):
+    """Length Of The Longest Run Of True Along Axis 0, Per Column"""
+    count = np.cumsum(mask, axis=0)
+    reset = np.maximum.accumulate(np.where(mask, 0, count), axis=0)
+    return (count - reset).max(axis=0, initial=0)
+
+
+def performance_table(returns, risk_free_rate=0, periods=TRADING_DAYS):
+    """
+    Performance Metrics For Every Column Of A (T, K) Matrix Of Returns.
+
+    One column per strategy or parameter set, all computed in one vectorized pass. NaN
+    returns are ignored for the mean based statistics and count as a flat day for the
+    equity curve; APR uses the full length T, as get_apr does. On NaN-free columns APR,
+    Sharpe Ratio and Max DD equal get_apr, get_sharpe_ratio and get_max_drawdown.
+    """
+    r, names = as_matrix(returns)
+
+    valid = ~np.isnan(r)
+    n = valid.sum(axis=0)
+    r0 = np.where(valid, r, 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        """APR"""
+        equity = np.cumprod(1 + r0, axis=0)
+        apr = equity[-1] ** (periods / len(r)) - 1
+
+        """Sharpe & Sortino"""
+        excess = np.where(valid, r - risk_free_rate, 0)
+        mean = excess.sum(axis=0) / n
+        std = np.sqrt(np.square(np.where(valid, excess - mean, 0)).sum(axis=0) / (n - 1))
+        downside = np.sqrt(np.square(np.minimum(excess, 0)).sum(axis=0) / n)
+        sharpe = mean / std * np.sqrt(periods)
+        sortino = mean / downside * np.sqrt(periods)
+
+        """Drawdown depth & duration (periods spent below the running peak)"""
+        peak = np.maximum.accumulate(equity, axis=0)
+        max_dd = ((peak - equity) / peak).max(axis=0)
+        dd_duration = _longest_run(equity < peak)
+        calmar = apr / max_dd
+
+        """Share of winning periods among periods with a non-zero return"""
+        hit_rate = (r0 > 0).sum(axis=0) / (r0 != 0).sum(axis=0)
+
+    return pd.DataFrame({"APR": apr, "Sharpe Ratio": sharpe, "Sortino Ratio": sortino, "Max DD": max_dd,
+                         "Max DD Duration": dd_duration, "Calmar Ratio": calmar, "Hit Rate": hit_rate}, index=names)
+
+
+def print_performance_table(table, n=None):
+    """Print A performance_table (Optionally Only Its First n Rows)"""
+    if n is not None:
+        table = table.head(n)
+    print(tabulate(table, headers="keys", tablefmt="fancy_grid"))
+
+
+class OnlinePerformance:
+    """
+    Incremental APR, Sharpe Ratio And Max Drawdown, O(1) Per Update.
+
+    Keeps Welford mean/variance, the compounded equity value and its running peak. With
+    num_strategies set, every update takes a vector of returns and tracks each strategy
+    independently. NaN returns count towards the length (as in get_apr) but are otherwise
+    skipped. State round-trips through to_dict/from_dict, so monitors can restart without
+    replaying history.
+    """
+
+    def __init__(self, num_strategies=None, risk_free_rate=0, periods=TRADING_DAYS):
+        shape = () if num_strategies is None else (num_strategies,)
+        self.num_strategies = num_strategies
+        self.risk_free_rate = risk_free_rate
+        self.periods = periods
+        self.length = 0
+        self.count = np.zeros(shape)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.equity = np.ones(shape)
+        self.peak = np.full(shape, np.nan)
+        self.max_dd = np.zeros(shape)
+
+    def update(self, ret):
+        ret = np.broadcast_to(np.asarray(ret, dtype=float), self.mean.shape)
+        valid = ~np.isnan(ret)
+        r = np.where(valid, ret, 0)
+
+        self.length += 1
+        self.count = self.count + valid
+
+        """Welford mean & variance"""
+        delta = np.where(valid, r - self.mean, 0)
+        self.mean = self.mean + delta / np.maximum(self.count, 1)
+        self.m2 = self.m2 + delta * np.where(valid, r - self.mean, 0)
+
+        """Equity, peak and drawdown"""
+        self.equity = self.equity * (1 + r)
+        self.peak = np.fmax(self.peak, self.equity)
+        self.max_dd = np.maximum(self.max_dd, (self.peak - self.equity) / self.peak)
+
+    def snapshot(self):
+        """Current Statistics, Same Values As performance_summary On The Returns So Far"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            apr = self.equity ** (self.periods / self.length) - 1
+            std = np.sqrt(self.m2 / (self.count - 1))
+            sharpe = (self.mean - self.risk_free_rate) / std * np.sqrt(self.periods)
+        return pd.DataFrame({"APR": np.atleast_1d(apr), "Sharpe Ratio": np.atleast_1d(sharpe),
+                             "Max DD": np.atleast_1d(self.max_dd)})
+
+    def to_dict(self):
+        state = {"num_strategies": self.num_strategies, "risk_free_rate": self.risk_free_rate,
+                 "periods": self.periods, "length": self.length}
+        for key in ["count", "mean", "m2", "equity", "max_dd"]:
+            state[key] = getattr(self, key).tolist()
+        """No peak before the first update (NaN is not valid JSON)"""
+        state["peak"] = self.peak.tolist() if self.length else None
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        obj = cls(state["num_strategies"], state["risk_free_rate"], state["periods"])
+        obj.length = state["length"]
+        for key in ["count", "mean", "m2", "equity", "max_dd"]:
+            setattr(obj, key, np.array(state[key], dtype=float))
+        if state["peak"] is not None:
+            obj.peak = np.array(state["peak"], dtype=float)
+        return obj
@@ -1,5 +1,8 @@
 # In[ ]:
 from .momentum_testing import *
+from ..backtest import lookback_returns, next_returns
+from ..events import StepPanel
+from ..metrics import performance_table
 
 eps = 10 ** -10
 
@@ -15,28 +18,49 @@ def momentum_rule(x, bottom, top):
         return 0.0
 
 
-def cross_sectional_momentum(df: pd.DataFrame, lookback, holdday, num_stocks=5):
-    return_lookback = ((df - df.shift(lookback)) / df.shift(lookback))
+def _kth_smallest(x, k):
+    """k-th Smallest Non-NaN Value Of Each Row (NaN If The Row Has Fewer Values)"""
+    x = np.where(np.isnan(x), np.inf, x)
+    kth = np.partition(x, k - 1, axis=1)[:, k - 1]
+    return np.where(np.isinf(kth), np.nan, kth)
 
-    return_daily = df.pct_change().shift(-1).iloc[lookback:]
 
-    positions = return_lookback.copy()
+def momentum_positions(return_lookback, num_stocks):
+    """Short The num_stocks Worst & Long The num_stocks Best Lookback Returns Of Each Row"""
+    return_lookback = np.asarray(return_lookback, dtype=float)
 
     """Find Best & Worst Performing Return Cutoff"""
-    positions["bottom"] = positions.apply(lambda x: np.sort(x)[num_stocks - 1] + eps, axis=1)
-    positions["top"] = positions.apply(lambda x: np.sort(x)[-num_stocks] - eps, axis=1)
+    bottom = _kth_smallest(return_lookback, num_stocks) + eps
+    top = -_kth_smallest(-return_lookback, num_stocks) - eps
 
     """Place Positions Accordingly"""
-    for col in positions.columns:
-        positions[col] = positions.apply(lambda x: momentum_rule(x[col], x["bottom"], x["top"]), axis=1)
-    positions = positions.drop(columns=["bottom", "top"])
-    temp = positions.copy()
-    for h in range(1, holdday):
-        positions = positions + temp.shift(h).fillna(0)
+    with np.errstate(invalid="ignore"):
+        shorts = return_lookback < bottom[:, np.newaxis]
+        longs = return_lookback > top[:, np.newaxis]
+    return np.where(shorts, -1.0, np.where(longs, 1.0, 0.0))
+
+
+def hold_positions(positions, holdday):
+    """Sum Of Positions Entered Over The Last holdday Days, Via Cumulative Sums"""
+    cuml = np.cumsum(positions, axis=0)
+    held = cuml.copy()
+    held[holdday:] -= cuml[:-holdday]
+    return held
+
+
+def cross_sectional_momentum_returns(prices, lookback, holdday, num_stocks=5):
+    """Daily Strategy Returns From A (T, N) Price Array"""
+    prices = np.asarray(prices, dtype=float)
+    positions = hold_positions(momentum_positions(lookback_returns(prices, lookback), num_stocks), holdday)
     positions /= (holdday * num_stocks * 2)
 
     """Calculate Strategy Return From Positions"""
-    strategy_return = (positions * return_daily).sum(axis=1)
+    return np.nansum(positions * next_returns(prices), axis=1)
+
+
+def cross_sectional_momentum(df: pd.DataFrame, lookback, holdday, num_stocks=5):
+    strategy_return = pd.Series(cross_sectional_momentum_returns(df.values, lookback, holdday, num_stocks),
+                                index=df.index)
 
     (1 + strategy_return).cumprod().plot(
         label=f"Cross-sectional Momentum Strategy ({lookback},{holdday}, {num_stocks})")
@@ -48,13 +72,35 @@ def cross_sectional_momentum(df: pd.DataFrame, lookback, holdday, num_stocks=5):
                         params={"lookback": lookback, "holding period": holdday, "stocks": num_stocks})
 
 
+def cross_sectional_momentum_sweep(df: pd.DataFrame, lookbacks, holddays, num_stocks):
+    """
+    Run Every (lookback, holdday, num_stocks) Combination And Tabulate Performance.
+
+    The lookback return matrix is computed once per lookback and the ranked positions once
+    per (lookback, num_stocks); only the holding period sum is redone per holdday.
+    """
+    prices = df.values.astype(float)
+    return_daily = next_returns(prices)
+
+    params, returns = [], []
+    for lookback in lookbacks:
+        return_lookback = lookback_returns(prices, lookback)
+        for n in num_stocks:
+            positions = momentum_positions(return_lookback, n)
+            for holdday in holddays:
+                held = hold_positions(positions, holdday) / (holdday * n * 2)
+                params.append({"lookback": lookback, "holdday": holdday, "num_stocks": n})
+                returns.append(np.nansum(held * return_daily, axis=1))
+
+    return pd.concat([pd.DataFrame(params), performance_table(np.column_stack(returns))], axis=1)
+
+
 # In[ ]
 def main():
     df = read_df("./data/equity/NIFTY_100_STOCKS_Close.csv")
 
     """Mask to deal with stock splits"""
-    df_mask = read_df("./data/equity/NIFTY_100_STOCKS_SPLIT_MASK.csv")
-    df = df * df_mask
+    df = StepPanel.load("./data/equity/NIFTY_100_STOCKS_SPLIT_MASK.npz").apply(df)
 
     cross_sectional_momentum(df, lookback=25, holdday=25, num_stocks=10)
 
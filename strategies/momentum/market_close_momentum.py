@@ -5,12 +5,24 @@ from ..utils import *
 
 
 # In[]
+def market_close_momentum_returns(close, snapshot, thresholds=0.005):
+    """market_close_momentum Returns For (T,) Or (T, N) Close And Intraday Snapshot Prices"""
+    close = np.asarray(close, dtype=float)
+    snapshot = np.asarray(snapshot, dtype=float)
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[1:] = close[:-1]
+    thresholds = np.asarray(thresholds, dtype=float)
+    if thresholds.ndim > 0:
+        close, snapshot, prev_close = (i[..., np.newaxis] for i in (close, snapshot, prev_close))
+
+    longs = (snapshot > (1 + thresholds) * prev_close).astype(int)
+    shorts = (snapshot < (1 - thresholds) * prev_close).astype(int)
+    return (longs - shorts) * (close / snapshot - 1)
+
+
 def market_close_momentum(df: pd.DataFrame, threshold=0.005):
     """315: Price at 3:15 PM. Market Closes At 3:30 PM"""
-    df["longs"] = (df["315"] > (1 + threshold) * df["Close"].shift(1)).astype(int)
-    df["shorts"] = (df["315"] < (1 - threshold) * df["Close"].shift(1)).astype(int)
-    df["positions"] = df["shorts"] + df["longs"]
-    df["return"] = df["positions"] * (df["Close"] / df["315"] - 1)
+    df["return"] = market_close_momentum_returns(df["Close"].values, df["315"].values, threshold)
     (1 + df["return"]).cumprod().plot(label=f"Market Close Momentum Strategy")
     plt.legend()
     plt.show()
@@ -1,35 +1,89 @@
 # In[ ]:
 
 import matplotlib.pyplot as plt
-from scipy.stats import pearsonr
+from scipy.stats import t as t_dist
 
 from ..utils import *
 
 
 # In[ ]
+def _masked_pearsonr(x, y):
+    """Pearson r And Two-Sided p-value Along Axis 1, Ignoring Pairs With A NaN"""
+    valid = ~(np.isnan(x) | np.isnan(y))
+    n = valid.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xd = np.where(valid, x - np.nansum(np.where(valid, x, 0), axis=1, keepdims=True) / n[:, np.newaxis], 0)
+        yd = np.where(valid, y - np.nansum(np.where(valid, y, 0), axis=1, keepdims=True) / n[:, np.newaxis], 0)
+        r = (xd * yd).sum(axis=1) / np.sqrt((xd * xd).sum(axis=1) * (yd * yd).sum(axis=1))
+        r = np.clip(r, -1, 1)
+        t_stat = r * np.sqrt((n - 2) / (1 - r * r))
+    p_val = 2 * t_dist.sf(np.abs(t_stat), n - 2)
+    r[n < 3] = np.nan
+    p_val[n < 3] = np.nan
+    return r, p_val, n
+
+
+def momentum_correlations(prices, lookbacks, holddays, log_returns=True):
+    """
+    Correlation Of Past (lookback) And Future (holdday) Returns For Every Combination.
+
+    prices is a Series or a (T, N) DataFrame of instruments. Multi-horizon log price
+    differences are built once; as in momentum_test, each combination samples every
+    min(lookback, holdday)-th row so the return windows do not overlap. Combinations sharing
+    a sampling step are correlated together. Returns a tidy DataFrame.
+    """
+    if isinstance(prices, pd.Series):
+        prices = prices.to_frame()
+    log_prices = np.log(prices.values.astype(float))
+    T = len(log_prices)
+
+    """Past k-day returns; future k-day return at t is the past return at t + k"""
+    past, fut = {}, {}
+    for k in set(lookbacks) | set(holddays):
+        diff = np.full(log_prices.shape, np.nan)
+        diff[k:] = log_prices[k:] - log_prices[:-k]
+        if not log_returns:
+            diff = np.expm1(diff)
+        past[k] = diff
+        fut[k] = np.full(log_prices.shape, np.nan)
+        fut[k][:-k] = diff[k:]
+
+    combos = {}
+    for lookback in lookbacks:
+        for holdday in holddays:
+            combos.setdefault(min(lookback, holdday), []).append((lookback, holdday))
+
+    results = []
+    for step, pairs in combos.items():
+        rows = np.arange(0, T, step)
+        x = np.stack([past[lookback][rows] for lookback, _ in pairs])
+        y = np.stack([fut[holdday][rows] for _, holdday in pairs])
+
+        """(combos, rows, instruments) -> correlate along rows"""
+        r, p_val, n = _masked_pearsonr(x.transpose(0, 2, 1).reshape(-1, len(rows)),
+                                       y.transpose(0, 2, 1).reshape(-1, len(rows)))
+        pairs = np.array(pairs)
+        results.append(pd.DataFrame({
+            "instrument": np.tile(prices.columns.values, len(pairs)),
+            "lookback": np.repeat(pairs[:, 0], prices.shape[1]),
+            "holddays": np.repeat(pairs[:, 1], prices.shape[1]),
+            "correlation": r, "significance": p_val, "samples": n}))
+
+    return pd.concat(results).dropna(subset=["correlation"]).sort_values(
+        ["instrument", "lookback", "holddays"]).reset_index(drop=True)
+
+
 def momentum_test(dff, p_val_thresh=0.3):
-    corr = []
     lookbacks = [1, 5, 10, 25, 60, 120, 250]
     holddays = [1, 5, 10, 25, 60, 120, 250]
-    for lookback in lookbacks:
-        for holdday in holddays:
-            df = dff.copy(deep=True)
-            df["ret_past"] = df["Close"].pct_change(lookback)
-            df["ret_fut"] = df["Close"].shift(-holdday).pct_change(periods=holdday)
-            choose = range(0, len(df), min(holdday, lookback))
-            df = df.iloc[choose, :]
-            df = df.dropna(subset=["ret_past", "ret_fut"])
-            if len(df) < 3:
-                continue
-            """Correlation Coeff And Its Significance"""
-            r, p_val = pearsonr(df["ret_past"], df["ret_fut"])
-            if p_val > p_val_thresh:
-                continue
-            corr.append({"lookback": lookback, "holddays": holdday, "correlation": r, "significance": p_val})
+    df_corr = momentum_correlations(dff["Close"], lookbacks, holddays, log_returns=False)
+
+    """Correlation Coeff And Its Significance"""
+    df_corr = df_corr[df_corr["significance"] <= p_val_thresh]
+    df_corr = df_corr[["lookback", "holddays", "correlation", "significance"]].reset_index(drop=True)
     print_dashed_line()
-    df_corr = pd.DataFrame(corr)
     print_df(df_corr, len(df_corr))
-    return corr
+    return df_corr.to_dict("records")
 
 
 def momentum_strategy(df, lookback, holdday):
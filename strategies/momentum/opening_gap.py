@@ -4,6 +4,25 @@ from .momentum_testing import *
 
 
 # In[]
+def opening_gap_returns(open_, high, low, close, z_entry_scores=0.1, rolling_window=90):
+    """opening_gap_strategy Returns For (T,) Or (T, N) Open / High / Low / Close Arrays, NaN While Warming Up"""
+    open_, high, low, close = (np.asarray(i, dtype=float) for i in (open_, high, low, close))
+    ret = pd.DataFrame(close.reshape(len(close), -1)).pct_change()
+    std = ret.rolling(window=rolling_window).std().shift().values.reshape(close.shape)
+    prev_high = np.full(high.shape, np.nan)
+    prev_high[1:] = high[:-1]
+    prev_low = np.full(low.shape, np.nan)
+    prev_low[1:] = low[:-1]
+
+    z_entry_scores = np.asarray(z_entry_scores, dtype=float)
+    if z_entry_scores.ndim > 0:
+        open_, close, std, prev_high, prev_low = (i[..., np.newaxis] for i in (open_, close, std, prev_high, prev_low))
+
+    longs = (open_ > prev_high * (1 + z_entry_scores * std)).astype(int)
+    shorts = (open_ < prev_low * (1 - z_entry_scores * std)).astype(int)
+    return np.where(np.isnan(std), np.nan, (longs - shorts) * (close / open_ - 1))
+
+
 def opening_gap_strategy(df: pd.DataFrame, z_entry_score=0.1, rolling_window=90, show_results=True,return_pos=False):
     df["std"] = df["Close"].pct_change().rolling(window=rolling_window).std().shift()
     df = df.dropna(subset=["std"])
@@ -1,26 +1,24 @@
 # In[ ]
 from matplotlib import pyplot as plt
-import datetime
 from ..data_download import *
+from ..events import EventIndex, StepPanel, TradingCalendar
 
 
 # In[ ]
-def fill_positions(x):
-    """Fill cells that correspond to a corporate announcement"""
-    if pd.isna(x["symbol"]):
-        x = x.apply(lambda x: 0)
-    else:
-        symbols = x["symbol"].split("|")
-        for symbol in x.index:
-            if symbol in symbols:
-                x[symbol] = 1
-            else:
-                x[symbol] = 0
-    return x
+def read_event_dates(path, date_col):
+    """(Dates, Symbols) Of An NSE Corporate Events / Actions Download"""
+    df = pd.read_csv(path, usecols=[date_col, "symbol"])
+    return pd.to_datetime(df[date_col], format="%d-%b-%Y"), df["symbol"]
 
 
 def prepare_dataset():
-    """Fetch And Prepare Dataset"""
+    """
+    Fetch And Prepare Dataset.
+
+    Sessions and columns come from NIFTY_100_STOCKS_Close.csv (the panel the strategy
+    trades, restricted to NIFTY_100_STOCKS_LIST), not IND_IDX_NIFTY_100.csv and the
+    constituents panel.
+    """
 
     """
     fetch_nifty_constituents_data(index="NIFTY 100",
@@ -31,65 +29,22 @@ def prepare_dataset():
     """
 
     nifty_100_stocks = list(pd.read_csv("./data/equity/NIFTY_100_STOCKS_LIST.csv")["Symbol"])
-    nifty_100 = pd.read_csv("./data/equity/IND_IDX_NIFTY_100.csv", parse_dates=["Date"])
-
-    """Corporate Events"""
-    corp_events = pd.read_csv("./data/equity/IND_EQ_EVENTS.csv", parse_dates=["date"],
-                              date_parser=lambda x: datetime.strptime(x, "%d-%b-%Y"))
-    corp_events = corp_events.groupby("date")["symbol"].apply(list)
-    corp_events = corp_events.apply(lambda x: [i for i in x if i in nifty_100_stocks])
-    dct = {}
-    for idx, symbols in corp_events.iteritems():
-        if len(symbols) == 0:
-            continue
-        evt_date = idx
-        nxt_date = nifty_100[nifty_100["Date"] > evt_date]["Date"].min()
-        if nxt_date not in dct.keys():
-            dct[nxt_date] = []
-        dct[nxt_date].extend(symbols)
-
-    lst = []
-    for date, symbols in dct.items():
-        lst.append({"Date": date, "Symbols": "|".join(symbols)})
-    df_events = pd.DataFrame.from_records(lst)
-    df_events.to_csv("./data/equity/NIFTY_100_POST_EVENT_DATE.csv", index=False)
-
-    """Dividends"""
-    ex_dividends = pd.read_csv("./data/equity/IND_EQ_DIVIDENDS.csv", parse_dates=["exDate"],
-                               date_parser=lambda x: datetime.strptime(x, "%d-%b-%Y"))
-    ex_dividends = ex_dividends.groupby("exDate")["symbol"].apply(list)
-    ex_dividends = ex_dividends.apply(lambda x: [i for i in x if i in nifty_100_stocks])
-    dct = {}
-    for idx, symbols in ex_dividends.iteritems():
-        if len(symbols) == 0:
-            continue
-        evt_date = idx
-        nxt_date = nifty_100[nifty_100["Date"] >= evt_date]["Date"].min()
-        if nxt_date not in dct.keys():
-            dct[nxt_date] = []
-        dct[nxt_date].extend(symbols)
-
-    lst = []
-    for date, symbols in dct.items():
-        lst.append({"Date": date, "Symbols": "|".join(symbols)})
-    df_ex_div = pd.DataFrame.from_records(lst)
-    df_ex_div.to_csv("./data/equity/NIFTY_100_EX_DIV_DATE.csv", index=False)
-
-    """Merge both df and remove dividends from corporate events"""
-    df_events.columns = ["a"]
-    df_ex_div.columns = ["b"]
-    df = pd.merge(df_events, df_ex_div, how="outer", left_index=True, right_index=True).fillna("")
-    df["symbol"] = df.apply(lambda x: "|".join(list(set(x["b"].split("|")).difference(set(x["a"].split("|"))))), axis=1)
-    df.to_csv("./data/equity/NIFTY_100_NON_DIV_EVENTS.csv")
-
-    df_events = pd.read_csv("./data/equity/NIFTY_100_NON_DIV_EVENTS.csv", index_col="Date", parse_dates=["Date"])
-    df_close = pd.read_csv("./data/equity/NIFTY_100_CONSTITUENTS_DATA_Close.csv", index_col="Date",
-                           parse_dates=["Date"])
-
-    """Prepare Final Dataset"""
-    df_earn_ann = df_close.copy().join(df_events)
-    df_earn_ann = df_earn_ann.apply(fill_positions, axis=1).drop(columns='symbol')
-    df_earn_ann.to_csv("./data/equity/NIFTY_100_POST_EARN_ANN.csv")
+    df_close = read_df("./data/equity/NIFTY_100_STOCKS_Close.csv")
+    calendar = TradingCalendar(df_close.index)
+    tickers = [ticker for ticker in df_close.columns if ticker in nifty_100_stocks]
+
+    """Corporate Events, traded on the next session"""
+    events = EventIndex.from_events(calendar, tickers, *read_event_dates("./data/equity/IND_EQ_EVENTS.csv", "date"))
+
+    """Dividends, on the ex-date (or the next session)"""
+    ex_dividends = EventIndex.from_events(calendar, tickers,
+                                          *read_event_dates("./data/equity/IND_EQ_DIVIDENDS.csv", "exDate"),
+                                          inclusive=True)
+
+    """Remove dividends from corporate events and build the final dataset"""
+    events = events.difference(ex_dividends)
+    events.save("./data/equity/NIFTY_100_POST_EARN_ANN.npz")
+    events.to_frame().to_csv("./data/equity/NIFTY_100_POST_EARN_ANN.csv")
 
 
 def post_events_momentum_strategy(df_open, df_close, df_earn_ann, lookback=90, threshold=0.5):
@@ -120,11 +75,11 @@ def main():
     df_close = read_df("./data/equity/NIFTY_100_STOCKS_Close.csv")
 
     """Stock Split Mask"""
-    df_mask = read_df("./data/equity/NIFTY_100_STOCKS_SPLIT_MASK.csv")
-    df_open = df_mask * df_open
-    df_close = df_mask * df_close
+    split_mask = StepPanel.load("./data/equity/NIFTY_100_STOCKS_SPLIT_MASK.npz")
+    df_open = split_mask.apply(df_open)
+    df_close = split_mask.apply(df_close)
 
-    df_earn_ann = read_df("./data/equity/NIFTY_100_POST_EARN_ANN.csv")
+    df_earn_ann = EventIndex.load("./data/equity/NIFTY_100_POST_EARN_ANN.npz").to_frame()
     post_events_momentum_strategy(df_open, df_close, df_earn_ann)
 
 
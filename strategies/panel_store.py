@@ -0,0 +1,150 @@
+import io
+import json
+import os
+import shutil
+
+from .utils import *
+
+MANIFEST = "manifest.json"
+DATES = "dates.bin"
+
+
+def _column_path(root, field, ticker):
+    return os.path.join(root, field, f"{ticker}.bin")
+
+
+def _read_manifest(root):
+    path = os.path.join(root, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(root, manifest):
+    """Atomic Replace: The Manifest Is The Commit Point Of An Update"""
+    with atomic_write(os.path.join(root, MANIFEST)) as f:
+        json.dump(manifest, f)
+
+
+def _read_new_rows(path, state, fields):
+    """
+    Rows Of A Per Ticker CSV Past The Byte Offset Already Merged.
+
+    state holds the offset, the file's inode, its first data line and the last line read.
+    The file is read from the start again if it is new to the panel, was replaced (e.g.
+    by an atomic rewrite merging in older rows), shrank, or its first line or the line
+    ending at the offset changed. Only complete lines are consumed. Returns (rows, new
+    state, whether the column must be reset).
+    """
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        header = f.readline()
+        start = f.tell()
+        line = f.readline().decode()
+        offset = state.get("offset")
+        last_line = state.get("last_line", "").encode()
+        reset = (offset is None or stat.st_ino != state.get("inode") or line != state.get("first_line")
+                 or stat.st_size < offset or offset - len(last_line) < start)
+        if not reset:
+            f.seek(offset - len(last_line))
+            reset = f.read(len(last_line)) != last_line
+        f.seek(start if reset else offset)
+        data = f.read()
+    data = data[:data.rfind(b"\n") + 1]
+    rows = pd.read_csv(io.BytesIO(header + data), index_col=0, parse_dates=[0])[list(fields)]
+    if data:
+        last_line = data[data.rfind(b"\n", 0, len(data) - 1) + 1:]
+    elif reset:
+        last_line = b""
+    state = {"offset": (start if reset else offset) + len(data), "inode": stat.st_ino, "first_line": line,
+             "last_line": last_line.decode()}
+    return rows, state, reset
+
+
+def _extend(path, dtype, length, values):
+    """Cut A Column File Back To length Rows (Drops A Crashed Update) And Append values"""
+    with open(path, "ab") as f:
+        f.truncate(length * np.dtype(dtype).itemsize)
+        f.write(np.asarray(values, dtype=dtype).tobytes())
+
+
+def update_panel(files, root, fields=("Open", "Close")):
+    """
+    Append New Rows Of Per Ticker CSVs To Wide Binary Panels, Incrementally.
+
+    root holds dates.bin (datetime64[ns]), one raw float64 file per field and ticker, and
+    a manifest with the panel length plus, per ticker, the last date merged, the byte
+    offset read so far, the file's inode and the last line read. An update reads only the
+    CSV bytes past those offsets (a replaced or rewritten CSV is re-read and its column
+    rebuilt), appends the new sessions to dates.bin and NaN rows to every column, then
+    writes the new values in place; a new ticker adds its own column files. Missing data is NaN. Sessions older
+    than the panel's last date that it does not contain force a full rebuild. Returns the
+    number of sessions appended.
+    """
+    manifest = _read_manifest(root) or {"fields": list(fields), "tickers": [], "length": 0, "files": {},
+                                        "last_date": {}}
+    fields = manifest["fields"]
+    """Manifests without per file state (older layout) re-read every file once"""
+    files_state = manifest.setdefault("files", {})
+    for key in ["offsets", "first_line"]:
+        manifest.pop(key, None)
+    length = manifest["length"]
+    dates_path = os.path.join(root, DATES)
+    dates = np.fromfile(dates_path, dtype="datetime64[ns]", count=length) if length else np.array([], "datetime64[ns]")
+
+    updates = {}
+    for ticker, path in files.items():
+        updates[ticker] = _read_new_rows(path, files_state.get(ticker, {}), fields)
+
+    incoming = [rows.index.values.astype("datetime64[ns]") for rows, _, _ in updates.values()]
+    incoming = np.unique(np.concatenate(incoming)) if incoming else dates
+    new_dates = np.setdiff1d(incoming, dates)
+    if length and len(new_dates) and new_dates[0] <= dates[-1]:
+        print("Sessions inside the stored history are missing, rebuilding the panel")
+        shutil.rmtree(root)
+        return update_panel(files, root, fields)
+
+    """Extend the shared calendar and every existing column with NaN rows"""
+    for field in fields:
+        os.makedirs(os.path.join(root, field), exist_ok=True)
+    _extend(dates_path, "datetime64[ns]", length, new_dates)
+    total = length + len(new_dates)
+    for ticker in manifest["tickers"]:
+        for field in fields:
+            _extend(_column_path(root, field, ticker), float, length, np.full(len(new_dates), np.nan))
+
+    """New tickers add a column, existing history is not rewritten"""
+    for ticker in updates:
+        if ticker not in manifest["tickers"]:
+            for field in fields:
+                _extend(_column_path(root, field, ticker), float, 0, np.full(total, np.nan))
+            manifest["tickers"].append(ticker)
+
+    """Write the new values in place"""
+    all_dates = pd.DatetimeIndex(np.concatenate([dates, new_dates]))
+    for ticker, (rows, state, reset) in updates.items():
+        idx = all_dates.get_indexer(rows.index)
+        for field in fields:
+            column = np.memmap(_column_path(root, field, ticker), dtype=float, mode="r+", shape=(total,))
+            if reset:
+                column[:] = np.nan
+            column[idx] = rows[field].values
+            column.flush()
+        manifest["files"][ticker] = state
+        if len(rows):
+            manifest["last_date"][ticker] = str(rows.index.max().date())
+
+    manifest["length"] = total
+    _write_manifest(root, manifest)
+    return len(new_dates)
+
+
+def read_panel(root, field, tickers=None):
+    """(Dates, Tickers) DataFrame Of One Field Of A Panel Built By update_panel"""
+    manifest = _read_manifest(root)
+    length = manifest["length"]
+    tickers = manifest["tickers"] if tickers is None else tickers
+    dates = pd.DatetimeIndex(np.fromfile(os.path.join(root, DATES), dtype="datetime64[ns]", count=length), name="Date")
+    return pd.DataFrame({ticker: np.fromfile(_column_path(root, field, ticker), dtype=float, count=length)
+                         for ticker in tickers}, index=dates)
@@ -2,6 +2,7 @@
 from matplotlib import pyplot as plt
 from scipy.stats import pearson3
 
+from ..memo import cached_pearson3_fit
 from ..utils import *
 
 
@@ -9,7 +10,7 @@ from ..utils import *
 def fit_and_generate_pearson(prices: pd.Series, size=100000, show_plots=True):
     """Fit Pearson Type III Distribution & Generate Random Samples"""
     returns = prices.pct_change().dropna()
-    param = pearson3.fit(returns)
+    param = cached_pearson3_fit(returns)
     if show_plots:
         x = np.linspace(-0.1, 0.1, 100)
         pdf_fitted = pearson3.pdf(x, *param[:-2], loc=param[-2], scale=param[-1])
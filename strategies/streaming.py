@@ -0,0 +1,210 @@
+import math
+import time
+
+from tabulate import tabulate
+
+from .utils import *
+
+
+class RollingStats:
+    """
+    Rolling Mean / Std (ddof=1) / Z Score Over The Last window Values, O(1) Per Update.
+
+    Values sit in a fixed ring buffer; the mean and sum of squared deviations are updated
+    with Welford's add / remove steps (as pandas rolling does), so nothing is allocated or
+    recomputed per bar. NaN values are treated as missing and leave the window unchanged.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = [0.0] * window
+        self.pos = 0
+        self.count = 0
+        self.mean = 0.0
+        self.ssqd = 0.0
+
+    def update(self, x):
+        if x != x:
+            return
+        if self.count == self.window:
+            """Drop the oldest value"""
+            old = self.buffer[self.pos]
+            self.count -= 1
+            if self.count:
+                delta = old - self.mean
+                self.mean -= delta / self.count
+                self.ssqd -= delta * (old - self.mean)
+            else:
+                self.mean = self.ssqd = 0.0
+        self.buffer[self.pos] = x
+        self.pos = (self.pos + 1) % self.window
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.ssqd += delta * (x - self.mean)
+
+    @property
+    def ready(self):
+        return self.count == self.window
+
+    @property
+    def std(self):
+        if not self.ready or self.window < 2:
+            return math.nan
+        return math.sqrt(max(self.ssqd, 0.0) / (self.window - 1))
+
+    def z(self, x):
+        """Z Score Of x Against The Current Window, rolling_z When x Is The Latest Value"""
+        if not self.ready:
+            return math.nan
+        std = self.std
+        if std == 0:
+            return math.nan
+        return (x - self.mean) / std
+
+
+class EWMA:
+    """
+    Exponentially Weighted Mean, O(1) Per Update.
+
+    Same values as pd.Series.ewm(span=span or alpha=alpha, adjust=adjust).mean() on a
+    series without NaNs; adjust=True keeps the weighted numerator and denominator.
+    """
+
+    def __init__(self, span=None, alpha=None, adjust=True):
+        self.alpha = alpha if alpha is not None else 2 / (span + 1)
+        self.adjust = adjust
+        self.num = 0.0
+        self.den = 0.0
+        self.value = math.nan
+
+    def update(self, x):
+        if x != x:
+            return self.value
+        decay = 1 - self.alpha
+        if self.adjust:
+            self.num = x + decay * self.num
+            self.den = 1 + decay * self.den
+            self.value = self.num / self.den
+        else:
+            self.value = x if self.value != self.value else decay * self.value + self.alpha * x
+        return self.value
+
+
+class HysteresisState:
+    """Streaming hysteresis_state: enter Opens, leave Closes, Both Flip The State"""
+
+    def __init__(self):
+        self.state = 0
+
+    def update(self, enter, leave):
+        if enter and leave:
+            self.state = 1 - self.state
+        elif enter:
+            self.state = 1
+        elif leave:
+            self.state = 0
+        return self.state
+
+
+class BollingerStrategy:
+    """
+    Bar By Bar bollinger_bands: Z Of The Price Over window Bars Drives Long / Short States.
+
+    on_bar(price) returns the position (L - S) held from this bar's close to the next,
+    identical to the signal bollinger_bands_returns uses (flat while warming up).
+    """
+
+    def __init__(self, long_entry=-1, long_exit=-0.5, short_entry=1, short_exit=0.5, window=7):
+        self.long_entry = long_entry
+        self.long_exit = long_exit
+        self.short_entry = short_entry
+        self.short_exit = short_exit
+        self.stats = RollingStats(window)
+        self.long = HysteresisState()
+        self.short = HysteresisState()
+        self.z = math.nan
+
+    def on_bar(self, price):
+        self.stats.update(price)
+        z = self.z = self.stats.z(price)
+        longs = self.long.update(z < self.long_entry, z >= self.long_exit)
+        shorts = self.short.update(z > self.short_entry, z <= self.short_exit)
+        return longs - shorts
+
+
+class LatencyHistogram:
+    """Per Bar Latency Counts In Power Of Two Nanosecond Buckets, O(1) Per Record"""
+
+    def __init__(self, buckets=40):
+        self.counts = [0] * buckets
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        self.counts[min(int(ns).bit_length(), len(self.counts) - 1)] += 1
+        self.total += 1
+        self.max = max(self.max, ns)
+
+    def percentile(self, q):
+        """Upper Bound (ns) Of The Bucket Holding The q-th Percentile"""
+        target = q / 100 * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return 2 ** i
+        return math.nan
+
+    def summary(self):
+        rows = [[f"< {2 ** i / 1000:g} us", count] for i, count in enumerate(self.counts) if count]
+        print(tabulate(rows, headers=["Latency", "Bars"], tablefmt="fancy_grid"))
+        print(f"p50: {self.percentile(50) / 1000:g} us, p99: {self.percentile(99) / 1000:g} us, "
+              f"max: {self.max / 1000:g} us")
+
+
+def stream(strategy, feed, histogram=None):
+    """
+    Push (timestamp, price) Bars From Any Iterable Through strategy.on_bar.
+
+    Generator for live feeds: yields (timestamp, price, position) per bar as soon as the
+    strategy returns. The time spent in on_bar is recorded in histogram if given.
+    """
+    for timestamp, price in feed:
+        start = time.perf_counter_ns()
+        position = strategy.on_bar(price)
+        if histogram is not None:
+            histogram.record(time.perf_counter_ns() - start)
+        yield timestamp, price, position
+
+
+def replay(strategy, prices, histogram=None):
+    """
+    Batch Replay Of A Price Series Through stream.
+
+    Returns a DataFrame with the position held after each bar and the strategy return it
+    earns over the next bar (NaN on the last bar), the streaming counterpart of the
+    vectorized strategy functions.
+    """
+    prices = pd.Series(prices)
+    positions = np.array([position for _, _, position in stream(strategy, prices.items(), histogram)])
+    values = prices.values.astype(float)
+    ret = np.full(len(values), np.nan)
+    ret[:-1] = values[1:] / values[:-1] - 1
+    return pd.DataFrame({"Close": values, "Position": positions, "Return": positions * ret}, index=prices.index)
+
+
+def replay_csv(strategy, path, column="Close", histogram=None):
+    """replay Over One Column Of A CSV Read With read_df"""
+    return replay(strategy, read_df(path, return_cols=[column])[column], histogram)
+
+
+def main():
+    histogram = LatencyHistogram()
+    result = replay_csv(BollingerStrategy(window=20), "./data/equity/IND_IDX_NIFTY_50.csv", histogram=histogram)
+    performance_summary(result["Return"].dropna(), label="Streaming Bollinger Bands")
+    histogram.summary()
+
+
+if __name__ == "__main__":
+    main()
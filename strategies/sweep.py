@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+from itertools import product
+
+from .mean_reversion.bollinger_bands import bollinger_bands_returns
+from .metrics import performance_table
+from .utils import *
+
+SWEEP_CACHE_DIR = "./data/.sweep_cache"
+
+
+def expand_grid(grid):
+    """Dict Of Param -> Values Into A List Of Param Dicts (Lists Of Dicts Pass Through)"""
+    if isinstance(grid, dict):
+        keys = list(grid.keys())
+        return [dict(zip(keys, values)) for values in product(*grid.values())]
+    return list(grid)
+
+
+def data_fingerprint(prices):
+    """Hash Of The Price Array's Shape, dtype And Bytes"""
+    prices = np.ascontiguousarray(prices)
+    h = hashlib.sha1(f"{prices.shape}{prices.dtype}".encode())
+    h.update(prices.tobytes())
+    return h.hexdigest()[:20]
+
+
+def _param_key(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _load_prices(prices_path):
+    return np.load(prices_path, mmap_mode="r")
+
+
+def _run_chunk(strategy, chunk):
+    """Run strategy For Each Param Set, Score Equal-Length Return Series Together"""
+    prices = worker_shared()
+    by_length = {}
+    for i, params in enumerate(chunk):
+        returns = np.asarray(strategy(prices, **params), dtype=float)
+        by_length.setdefault(len(returns), []).append((i, returns))
+
+    results = [None] * len(chunk)
+    for items in by_length.values():
+        table = performance_table(np.column_stack([returns for _, returns in items]))
+        for (i, _), row in zip(items, table.to_dict("records")):
+            results[i] = row
+    return results
+
+
+def sweep(strategy, prices, grid, max_workers=None, chunk_size=100, cache_dir=SWEEP_CACHE_DIR):
+    """
+    Evaluate strategy(prices, **params) Over A Parameter Grid.
+
+    strategy must be a module level function returning an array of strategy returns, e.g.
+    bollinger_bands_returns. prices is written once as a .npy file that every worker
+    memory-maps. Metrics of each point are cached on disk keyed by the strategy, the data
+    fingerprint and the parameters, so re-running an expanded grid only computes new
+    points. Returns one row of params + performance_table metrics per grid point.
+    """
+    prices = np.asarray(prices, dtype=float)
+    points = expand_grid(grid)
+    fingerprint = data_fingerprint(prices)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    name = f"{strategy.__module__}.{strategy.__qualname__}"
+    cache_path = os.path.join(cache_dir, f"{name}_{fingerprint}.json")
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+
+    keys = [_param_key(params) for params in points]
+    todo = [params for key, params in zip(keys, points) if key not in cache]
+    todo = list({_param_key(params): params for params in todo}.values())
+
+    if todo:
+        prices_path = os.path.join(cache_dir, f"prices_{fingerprint}.npy")
+        if not os.path.exists(prices_path):
+            with atomic_write(prices_path, "wb") as f:
+                np.save(f, prices)
+
+        chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+        results = pool_map(_run_chunk, [strategy] * len(chunks), chunks, shared=prices_path, load=_load_prices,
+                           max_workers=max_workers)
+
+        for chunk, rows in zip(chunks, results):
+            for params, row in zip(chunk, rows):
+                cache[_param_key(params)] = row
+
+        """Atomic rewrite so an interrupted run never leaves a corrupt cache"""
+        with atomic_write(cache_path) as f:
+            json.dump(cache, f)
+
+    return pd.concat([pd.DataFrame(points), pd.DataFrame([cache[key] for key in keys])], axis=1)
+
+
+def main():
+    df = read_df("./data/equity/IND_IDX_NIFTY_50.csv")
+    grid = {"long_entry": [-2, -1.5, -1, -0.5], "long_exit": [-0.5, -0.25, 0],
+            "short_entry": [0.5, 1, 1.5, 2], "short_exit": [0, 0.25, 0.5], "window": [5, 10, 20, 40, 60]}
+    result = sweep(bollinger_bands_returns, df["Close"].values, grid)
+    print_df(result.sort_values("Sharpe Ratio", ascending=False), 10)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,13 @@
+import hashlib
+import json
 import math
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from functools import reduce
+from glob import glob
 
 import numpy as np
 import pandas as pd
@@ -9,8 +17,132 @@ from tabulate import tabulate
 pd.options.mode.chained_assignment = None
 
 
-def read_df(path, return_cols=None, prefix=""):
-    df = pd.read_csv(path, parse_dates=["Date"], index_col="Date")
+CACHE_DIR_NAME = ".npy_cache"
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+_worker_shared = None
+
+
+@contextmanager
+def atomic_write(path, mode="w"):
+    """
+    Open A Temporary File Next To path For Writing, Publish It With os.replace On Success.
+
+    Readers (and concurrent writers) only ever see the old or the complete new file; the
+    temporary file is removed if writing fails. The file keeps path's permissions.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        """mkstemp files are private, give the published file the usual permissions"""
+        os.chmod(tmp, os.stat(path).st_mode if os.path.exists(path) else 0o666 & ~_UMASK)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _cache_location(path):
+    """Cache Directory For A CSV, Keyed On Its Absolute Path, Size And Modification Time"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    path_key = hashlib.sha1(path.encode()).hexdigest()[:16]
+    stat_key = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+    root = os.path.join(os.path.dirname(path), CACHE_DIR_NAME)
+    return root, path_key, os.path.join(root, f"{path_key}_{stat_key}")
+
+
+def _write_cache(df, root, path_key, cache_dir):
+    """Write Index & One Column-Major Block Per dtype As .npy Files, Then Atomically Publish"""
+    cacheable = isinstance(df.index, pd.DatetimeIndex) and df.index.tz is None and all(
+        pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype) for dtype in df.dtypes)
+    if not cacheable:
+        return
+
+    blocks = {}
+    for i, dtype in enumerate(df.dtypes):
+        blocks.setdefault(str(dtype), []).append(i)
+
+    os.makedirs(root, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=root, prefix=".tmp_")
+    np.save(os.path.join(tmp, "index.npy"), df.index.values.view("int64"))
+    for k, positions in enumerate(blocks.values()):
+        np.save(os.path.join(tmp, f"block_{k}.npy"), np.asfortranarray(df.iloc[:, positions].values))
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"columns": list(df.columns), "blocks": list(blocks.values()),
+                   "index_dtype": str(df.index.dtype)}, f)
+
+    try:
+        os.rename(tmp, cache_dir)
+    except OSError:
+        """Another process published the same cache first"""
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    """Drop caches of older versions of the file"""
+    for old in glob(os.path.join(root, path_key + "_*")):
+        if old != cache_dir:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def _read_cache(cache_dir, return_cols):
+    """Memory-map The Blocks And Copy Out Only The Requested Columns"""
+    with open(os.path.join(cache_dir, "meta.json")) as f:
+        meta = json.load(f)
+
+    """Column name -> (block, position within block)"""
+    location = {}
+    for k, positions in enumerate(meta["blocks"]):
+        for j, i in enumerate(positions):
+            location[meta["columns"][i]] = (k, j)
+
+    if return_cols is None:
+        wanted = meta["columns"]
+    elif isinstance(return_cols, str):
+        wanted = [return_cols]
+    else:
+        wanted = list(return_cols)
+    missing = [col for col in wanted if col not in location]
+    if missing:
+        raise KeyError(f"{missing} not in index")
+
+    index = np.load(os.path.join(cache_dir, "index.npy"), mmap_mode="r").view(meta["index_dtype"])
+    index = pd.DatetimeIndex(index, name="Date")
+    blocks = {k: np.load(os.path.join(cache_dir, f"block_{k}.npy"), mmap_mode="r")
+              for k in {location[col][0] for col in wanted}}
+
+    if len(blocks) == 1:
+        """Single dtype: one 2D copy of the selected columns"""
+        block = next(iter(blocks.values()))
+        return pd.DataFrame(block[:, [location[col][1] for col in wanted]], index=index, columns=wanted)
+    data = {col: np.array(blocks[location[col][0]][:, location[col][1]]) for col in wanted}
+    return pd.DataFrame(data, index=index, columns=wanted)
+
+
+def read_df(path, return_cols=None, prefix="", cache=True):
+    """
+    Read A Date Indexed CSV.
+
+    With cache=True a columnar .npy copy is kept in a .npy_cache directory next to the CSV
+    and rebuilt whenever the CSV's size or modification time changes. Later reads
+    memory-map only the requested columns, so many processes share one copy.
+    """
+    df = None
+    if cache:
+        root, path_key, cache_dir = _cache_location(path)
+        if os.path.isdir(cache_dir):
+            df = _read_cache(cache_dir, return_cols)
+
+    if df is None:
+        df = pd.read_csv(path, parse_dates=["Date"], index_col="Date")
+        if cache:
+            try:
+                _write_cache(df, root, path_key, cache_dir)
+            except OSError:
+                """Read-only data directory etc., keep parsing the CSV"""
+                pass
     if return_cols is not None:
         df = df[return_cols]
     if prefix != "":
@@ -18,12 +150,79 @@ def read_df(path, return_cols=None, prefix=""):
     return df
 
 
-def merge_df(dfs):
-    return reduce(
-        lambda left, right: pd.merge(
-            left, right,
-            left_index=True, right_index=True), dfs
-    )
+def merge_df(dfs, how="inner", prefixes=None):
+    """
+    Join DataFrames On Their Index In One Pass.
+
+    how is "inner" (dates present in every frame), "outer" (dates in any frame) or "left"
+    (dates of the first frame). The joined date index is built once and every frame is
+    written into a preallocated array (one per dtype); the result is sorted by date for
+    inner/outer.
+    prefixes optionally prepends "<prefix>_" to each frame's columns.
+    """
+    dfs = list(dfs)
+    if prefixes is None:
+        columns = [col for df in dfs for col in df.columns]
+    else:
+        columns = [f"{prefix}_{col}" for df, prefix in zip(dfs, prefixes) for col in df.columns]
+
+    if not all(df.index.is_unique for df in dfs) or len(set(columns)) < len(columns):
+        """Duplicate dates need pandas' many-to-many semantics, duplicate names its _x / _y suffixes"""
+        if prefixes is not None:
+            dfs = [df.add_prefix(prefix + "_") for df, prefix in zip(dfs, prefixes)]
+        return reduce(lambda left, right: pd.merge(left, right, how=how, left_index=True, right_index=True), dfs)
+
+    if how == "left":
+        index = dfs[0].index
+    else:
+        values, counts = np.unique(np.concatenate([df.index.values for df in dfs]), return_counts=True)
+        if how == "inner":
+            values = values[counts == len(dfs)]
+        index = pd.Index(values, name=dfs[0].index.name)
+
+    """
+    One preallocated array per result dtype. Frames covering every date (all of them for
+    inner, the first for left) keep their dtypes, elsewhere int/bool columns become float
+    / object where dates are missing, as with pd.merge.
+    """
+    targets = []
+    for k, df in enumerate(dfs):
+        complete = how == "inner" or (how == "left" and k == 0)
+        for dtype in df.dtypes:
+            if not pd.api.types.is_numeric_dtype(dtype) or (pd.api.types.is_bool_dtype(dtype) and not complete):
+                targets.append(np.dtype(object))
+            else:
+                targets.append(np.dtype(dtype) if complete else np.result_type(np.float64, dtype))
+    blocks = {}
+    for i, dtype in enumerate(targets):
+        blocks.setdefault(dtype, []).append(i)
+    arrays = {}
+    for dtype, positions in blocks.items():
+        if how != "inner" and (dtype == object or np.issubdtype(dtype, np.floating)):
+            arrays[dtype] = np.full((len(index), len(positions)), np.nan, dtype=dtype)
+        else:
+            arrays[dtype] = np.empty((len(index), len(positions)), dtype=dtype)
+    slot = {i: (dtype, j) for dtype, positions in blocks.items() for j, i in enumerate(positions)}
+
+    col = 0
+    for df in dfs:
+        rows = index.get_indexer(df.index)
+        keep = rows >= 0
+        if len(blocks) == 1:
+            arrays[targets[0]][rows[keep], col:col + df.shape[1]] = df.values[keep]
+        else:
+            for j in range(df.shape[1]):
+                dtype, k = slot[col + j]
+                arrays[dtype][rows[keep], k] = df.iloc[:, j].values[keep]
+        col += df.shape[1]
+
+    if len(blocks) == 1:
+        return pd.DataFrame(arrays[targets[0]], index=index, columns=columns)
+    df = pd.concat([pd.DataFrame(arrays[dtype], index=index, columns=positions) for dtype, positions in blocks.items()],
+                   axis=1)
+    df = df[list(range(len(columns)))]
+    df.columns = columns
+    return df
 
 
 def print_df(df, n=10):
@@ -38,6 +237,20 @@ def print_dashed_line():
     print("-" * 80)
 
 
+def as_matrix(data):
+    """(T, N) Float Array And Column Labels Of A Series, DataFrame Or Array"""
+    values = np.asarray(data, dtype=float)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    if isinstance(data, pd.DataFrame):
+        names = data.columns
+    elif isinstance(data, pd.Series):
+        names = pd.Index([data.name])
+    else:
+        names = pd.RangeIndex(values.shape[1])
+    return values, names
+
+
 def vec_norm(x):
     x = np.array(x)
     return x / x[0]
@@ -50,6 +263,112 @@ def get_slr_coeff(x, y):
     return model.params[1]
 
 
+def _window_sum(a, window):
+    """Sum Over Trailing Windows From A Cumulative Sum, O(1) Per Bar"""
+    c = np.cumsum(a, axis=-1)
+    c = np.concatenate([np.zeros(c.shape[:-1] + (1,)), c], axis=-1)
+    return c[..., window:] - c[..., :-window]
+
+
+def rolling_slr_coeff(x, y, lookback, axis=-1):
+    """
+    Rolling SLR Slope & Intercept Of y On x From Running Sums.
+
+    x and y are (T,) or (N, T) (time along `axis`), so many pairs are fitted in one call.
+    The value at bar i is fitted on bars [i - lookback, i), matching get_slr_coeff on
+    that window; bars without a full window of valid data are NaN.
+    """
+    x = np.moveaxis(np.asarray(x, dtype=float), axis, -1)
+    y = np.moveaxis(np.asarray(y, dtype=float), axis, -1)
+    x, y = np.broadcast_arrays(x, y)
+    valid = ~(np.isnan(x) | np.isnan(y))
+
+    """Centre each series so the running sums do not lose precision"""
+    count = np.maximum(valid.sum(axis=-1, keepdims=True), 1)
+    x0 = np.where(valid, x, 0).sum(axis=-1, keepdims=True) / count
+    y0 = np.where(valid, y, 0).sum(axis=-1, keepdims=True) / count
+    xc = np.where(valid, x - x0, 0)
+    yc = np.where(valid, y - y0, 0)
+
+    n = _window_sum(valid.astype(float), lookback)
+    sx = _window_sum(xc, lookback)
+    sy = _window_sum(yc, lookback)
+    sxx = _window_sum(xc * xc, lookback)
+    sxy = _window_sum(xc * yc, lookback)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (sxy - sx * sy / n) / (sxx - sx * sx / n)
+        intercept = (sy - slope * sx) / n + y0 - slope * x0
+    slope[n < lookback] = np.nan
+    intercept[n < lookback] = np.nan
+
+    """Window ending before bar i"""
+    slopes = np.full(x.shape, np.nan)
+    intercepts = np.full(x.shape, np.nan)
+    slopes[..., lookback:] = slope[..., :-1]
+    intercepts[..., lookback:] = intercept[..., :-1]
+    return np.moveaxis(slopes, -1, axis), np.moveaxis(intercepts, -1, axis)
+
+
+def prefix_moments(data):
+    """
+    Running Sums Of The Outer Products Of [1, row] For A (T, K) Matrix.
+
+    Returns (T + 1, K + 1, K + 1) with the sufficient statistics of rows [0, t) at t: the
+    count at [0, 0], the column sums in row / column 0 and the cross-products in the rest.
+    Any window's moments are then one subtraction (window_moments). Rows with a NaN are
+    left out; callers centre the data first to keep the differences precise.
+    """
+    data = np.asarray(data, dtype=float)
+    valid = ~np.isnan(data).any(axis=1)
+    w = np.column_stack([valid, np.where(valid[:, np.newaxis], data, 0)])
+    prefix = np.zeros((len(w) + 1, w.shape[1], w.shape[1]))
+    np.cumsum(w[:, :, np.newaxis] * w[:, np.newaxis, :], axis=0, out=prefix[1:])
+    return prefix
+
+
+def window_moments(prefix, start, end):
+    """Moments Of Rows [start, end) From prefix_moments, start / end May Be Arrays Of Windows"""
+    return prefix[end] - prefix[start]
+
+
+def moments_cov(moments, demean=True):
+    """Covariance (Or Raw Second Moment) Matrix, Means And Count From window_moments"""
+    count = moments[..., 0, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = moments[..., 0, 1:] / count[..., np.newaxis]
+        cov = moments[..., 1:, 1:] / count[..., np.newaxis, np.newaxis]
+    if demean:
+        cov = cov - mean[..., :, np.newaxis] * mean[..., np.newaxis, :]
+    return cov, mean, count
+
+
+def _init_worker(shared, load):
+    global _worker_shared
+    _worker_shared = shared if load is None else load(shared)
+
+
+def worker_shared():
+    """The shared Object pool_map Handed To This Process"""
+    return _worker_shared
+
+
+def pool_map(fn, *iterables, shared=None, load=None, max_workers=None, chunksize=1):
+    """
+    list(map(fn, *iterables)) Over A Process Pool Whose Workers Receive shared Once.
+
+    Every worker runs load(shared) (or takes shared as is) in its initializer and fn reads
+    it back with worker_shared(), so a large price matrix is not pickled with every task.
+    With max_workers=1 or fewer than two tasks everything runs in this process.
+    """
+    iterables = [list(i) for i in iterables]
+    if max_workers == 1 or min(map(len, iterables), default=0) < 2:
+        _init_worker(shared, load)
+        return list(map(fn, *iterables))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(shared, load)) as executor:
+        return list(executor.map(fn, *iterables, chunksize=chunksize))
+
+
 def get_sharpe_ratio(ts: pd.Series, risk_free_rate=0, annualized=True):
     sharpe_ratio = (ts.mean() - risk_free_rate) / ts.std()
     if annualized:
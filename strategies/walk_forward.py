@@ -0,0 +1,130 @@
+import math
+
+from .mean_reversion.cointegration import portfolio_mean_reversion_returns
+from .mean_reversion.johansen import johansen_design, johansen_from_moments
+from .utils import *
+
+
+def walk_forward_folds(length, train_size, test_size, expanding=False):
+    """
+    (train_start, test_start, test_end) Of Every Fold.
+
+    Test windows of test_size bars tile [train_size, length); each is preceded by a train
+    window of train_size bars (rolling) or by all earlier bars (expanding).
+    """
+    test_start = np.arange(train_size, length, test_size)
+    test_end = np.minimum(test_start + test_size, length)
+    train_start = np.zeros_like(test_start) if expanding else test_start - train_size
+    return np.column_stack([train_start, test_start, test_end])
+
+
+def fit_ols(prices, folds):
+    """Hedge Weights (beta, -1) Of The Last Column Regressed On The Others, For Every Train Window"""
+    centred = prices - np.nanmean(prices, axis=0)
+    moments = window_moments(prefix_moments(centred), folds[:, 0], folds[:, 1])
+    cov, _, _ = moments_cov(moments)
+    beta = np.linalg.solve(cov[:, :-1, :-1], cov[:, :-1, -1:])[..., 0]
+    return np.column_stack([beta, -np.ones(len(folds))])
+
+
+def fit_johansen(prices, folds, k_ar_diff=1, det_order=0):
+    """First Johansen Eigenvector Of Every Train Window"""
+    if det_order == 0:
+        prices = prices - np.nanmean(prices, axis=0)
+    prefix = prefix_moments(johansen_design(prices, k_ar_diff))
+    moments = window_moments(prefix, folds[:, 0] + k_ar_diff + 1, folds[:, 1])
+    _, evec, _ = johansen_from_moments(moments, prices.shape[1], det_order)
+    return evec[..., 0]
+
+
+FITS = {"ols": fit_ols, "johansen": fit_johansen}
+
+
+def fold_half_life(prices, folds, weights):
+    """
+    Half Life Of Each Fold's Spread prices @ weights Over Its Train Window.
+
+    Same lag-0 ADF regression as adf_matrix, but read off the moments of [X_t-1, dX_t]:
+    rho = w' cov(X_t-1, dX_t) w / w' cov(X_t-1) w.
+    """
+    n = prices.shape[1]
+    centred = prices - np.nanmean(prices, axis=0)
+    design = np.full((len(prices), 2 * n), np.nan)
+    design[1:, :n] = centred[:-1]
+    design[1:, n:] = np.diff(centred, axis=0)
+    moments = window_moments(prefix_moments(design), folds[:, 0] + 1, folds[:, 1])
+    cov, _, _ = moments_cov(moments)
+
+    w = weights[:, :, np.newaxis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rho = (np.swapaxes(w, 1, 2) @ cov[:, :n, n:] @ w / (np.swapaxes(w, 1, 2) @ cov[:, :n, :n] @ w))[:, 0, 0]
+        return np.where(rho < 0, -math.log(2) / rho, np.nan)
+
+
+def _run_fold(strategy, fold, weights, window):
+    """Out Of Sample Returns Of One Fold, With window - 1 Bars Of History To Warm Up Indicators"""
+    _, test_start, test_end = fold
+    start = test_start - window + 1
+    returns = strategy(worker_shared()[start:test_end + 1], weights, window)
+    return returns[window - 1:window - 1 + test_end - test_start]
+
+
+def walk_forward(df, fit="johansen", strategy=portfolio_mean_reversion_returns, train_size=504, test_size=21,
+                 expanding=False, window=None, max_window=90, max_workers=None):
+    """
+    Walk Forward Backtest: Refit On Every Train Window, Trade The Following Test Window.
+
+    fit is "ols", "johansen" or a function (prices, folds) -> (F, n) portfolio weights.
+    Fits read each window's sufficient statistics off one set of running cross-product
+    sums, so every refit costs O(n^3) however long and overlapping the windows are.
+    strategy(prices, weights, window) returns per bar returns (e.g.
+    portfolio_mean_reversion_returns); window defaults to the fold's in-sample half life,
+    capped at max_window; an explicit window needs 2..train_size + 1 bars of warm up
+    history before each test window. Folds run on a process pool that receives the prices once per
+    worker. Returns the stitched out of sample returns and the per fold parameters.
+    """
+    if window is not None and not 2 <= window <= train_size + 1:
+        raise ValueError(f"window must be between 2 and train_size + 1 ({train_size + 1}), got {window}")
+
+    prices = df.values.astype(float)
+    folds = walk_forward_folds(len(prices), train_size, test_size, expanding)
+    weights = (FITS[fit] if isinstance(fit, str) else fit)(prices, folds)
+    half_life = fold_half_life(prices, folds, weights)
+
+    if window is None:
+        windows = np.ceil(np.nan_to_num(half_life, nan=max_window))
+        windows = np.clip(windows, 2, min(max_window, train_size)).astype(int)
+    else:
+        windows = np.full(len(folds), window)
+
+    tasks = [[strategy] * len(folds), list(folds), list(weights), list(windows)]
+    results = pool_map(_run_fold, *tasks, shared=prices, max_workers=max_workers, chunksize=max(1, len(folds) // 16))
+
+    """Stitch the out of sample returns"""
+    returns = pd.Series(np.nan, index=df.index, name="Return")
+    for (_, test_start, test_end), fold_returns in zip(folds, results):
+        returns.iloc[test_start:test_end] = fold_returns
+
+    params = pd.DataFrame(weights, columns=df.columns, index=df.index[folds[:, 1]])
+    params["half_life"] = half_life
+    params["window"] = windows
+    return returns, params
+
+
+def main():
+    ticker_one = "AUS_IDX_SNP_ASX"
+    ticker_two = "CAN_IDX_SNP_TSK"
+    df_one = read_df(f"./data/equity/{ticker_one}.csv", return_cols=["Close"], prefix=ticker_one)
+    df_two = read_df(f"./data/equity/{ticker_two}.csv", return_cols=["Close"], prefix=ticker_two)
+    df = merge_df([df_one, df_two])
+    df.columns = [ticker_one, ticker_two]
+
+    for fit in FITS:
+        returns, params = walk_forward(df, fit=fit)
+        print_df(params, 5)
+        performance_summary(returns.dropna(), label=f"Walk Forward ({fit})")
+        print_dashed_line()
+
+
+if __name__ == "__main__":
+    main()
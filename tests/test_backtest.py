@@ -0,0 +1,24 @@
+import numpy as np
+
+from strategies.backtest import backtest
+
+
+def test_buy_and_hold_pays_costs_on_entry_only():
+    prices = np.array([[10.0], [11.0], [12.1], [11.0], [12.0]])
+    """Capital value of holding one share"""
+    positions = prices.copy()
+    res = backtest(positions, prices, costs=0.01)
+    free = backtest(positions, prices)
+
+    np.testing.assert_allclose(free.pnl[:-1] - res.pnl[:-1], [0.1, 0, 0, 0], atol=1e-12)
+
+
+def test_costs_charge_rebalancing_trades():
+    prices = np.array([[10.0, 20.0], [11.0, 20.0], [11.0, 22.0]])
+    positions = np.array([[100.0, -100.0], [100.0, -100.0], [0.0, 0.0]])
+    res = backtest(positions, prices, costs=0.001)
+    free = backtest(positions, prices)
+
+    """Entry 200, then trim 10 of drifted 110 long, then close 100 long and 110 short"""
+    np.testing.assert_allclose(free.pnl[:2] - res.pnl[:2], [0.2, 0.01])
+    assert np.isnan(res.pnl[2])
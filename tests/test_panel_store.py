@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.panel_store import read_panel, update_panel
+from strategies.utils import atomic_write
+
+
+def ticker_frame(dates, scale):
+    """Variable width values, so a stale offset lands mid-line"""
+    values = scale * (1 + np.arange(len(dates)) ** 2)
+    return pd.DataFrame({"Open": values, "Close": values + 0.5}, index=pd.DatetimeIndex(dates, name="Date"))
+
+
+def expected_panel(frames, field):
+    return pd.DataFrame({ticker: df[field] for ticker, df in frames.items()}).sort_index()
+
+
+@pytest.fixture
+def panel(tmp_path):
+    dates = pd.bdate_range("2021-01-01", "2021-04-30")
+    gap = (dates.month != 3)
+    frames = {"A": ticker_frame(dates[gap], 1.0), "B": ticker_frame(dates, 10.0)}
+    files = {ticker: str(tmp_path / f"{ticker}.csv") for ticker in frames}
+    for ticker, df in frames.items():
+        df.to_csv(files[ticker])
+    root = str(tmp_path / "panel")
+    update_panel(files, root)
+    return dates, frames, files, root
+
+
+def check(frames, root):
+    for field in ["Open", "Close"]:
+        pd.testing.assert_frame_equal(read_panel(root, field), expected_panel(frames, field), check_names=False,
+                                      check_index_type=False, check_freq=False)
+
+
+def test_append_is_incremental(panel):
+    dates, frames, files, root = panel
+    new_dates = pd.bdate_range("2021-05-03", periods=5)
+    new = ticker_frame(new_dates, 3.0)
+    new.to_csv(files["B"], mode="a", header=False)
+    frames["B"] = pd.concat([frames["B"], new])
+
+    assert update_panel(files, root) == 5
+    check(frames, root)
+
+
+def test_atomic_rewrite_of_the_middle_is_reread(panel):
+    dates, frames, files, root = panel
+    """Same first line and size pattern, only the March gap is filled"""
+    frames["A"] = ticker_frame(dates, 1.0)
+    with atomic_write(files["A"]) as f:
+        frames["A"].to_csv(f)
+
+    assert update_panel(files, root) == 0
+    check(frames, root)
+    assert read_panel(root, "Close")["A"][dates.month == 3].notna().all()
+
+
+def test_in_place_rewrite_of_the_middle_is_reread(panel):
+    dates, frames, files, root = panel
+    frames["A"] = ticker_frame(dates, 1.0)
+    frames["A"].to_csv(files["A"])
+
+    assert update_panel(files, root) == 0
+    check(frames, root)
@@ -0,0 +1,43 @@
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.utils import merge_df
+
+
+def reference_merge(dfs, how):
+    df = reduce(lambda left, right: pd.merge(left, right, how=how, left_index=True, right_index=True), dfs)
+    return df.sort_index() if how == "outer" else df
+
+
+@pytest.fixture
+def frames():
+    dates = pd.date_range("2020-01-01", periods=6, name="Date")
+    first = pd.DataFrame({"Volume": np.arange(6), "Up": [True, False] * 3, "Close": np.linspace(1, 2, 6)},
+                         index=dates)
+    second = pd.DataFrame({"Trades": np.arange(4)},
+                          index=dates[[0, 2, 4]].append(pd.DatetimeIndex(["2021-01-04"], name="Date")))
+    return first, second
+
+
+@pytest.mark.parametrize("how", ["inner", "left", "outer"])
+def test_merge_df_matches_pd_merge(frames, how):
+    pd.testing.assert_frame_equal(merge_df(frames, how), reference_merge(frames, how), check_freq=False)
+
+
+def test_merge_df_left_keeps_first_frame_dtypes(frames):
+    df = merge_df(frames, how="left")
+    assert df["Volume"].dtype == np.int64
+    assert df["Up"].dtype == bool
+    assert df["Trades"].dtype == np.float64
+
+
+@pytest.mark.parametrize("how", ["inner", "left", "outer"])
+def test_merge_df_duplicate_names_get_suffixes(frames, how):
+    first, second = frames
+    dfs = [first, second.rename(columns={"Trades": "Volume"})]
+    df = merge_df(dfs, how)
+    assert list(df.columns) == ["Volume_x", "Up", "Close", "Volume_y"]
+    pd.testing.assert_frame_equal(df, reference_merge(dfs, how), check_freq=False)